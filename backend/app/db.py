@@ -1,7 +1,13 @@
+import enum
+import io
+import math
 import os
+
+import orjson
 from dotenv import load_dotenv
 load_dotenv()
 from sqlalchemy import create_engine, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import sessionmaker
 
 # Redis imports (optional)
@@ -20,7 +26,19 @@ def get_db_url():
     db   = os.getenv("POSTGRES_DB")
     return f"postgresql+psycopg2://{user}:{pwd}@{host}:{port}/{db}"
 
-engine = create_engine(get_db_url(), pool_pre_ping=True, future=True)
+engine = create_engine(
+    get_db_url(),
+    pool_pre_ping=True,
+    # 日常流水线按股票并发执行，每个任务各自持有会话
+    pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    future=True,
+    query_cache_size=1200,
+    # INSERT executemany 合并为多行 VALUES（每页 1000 行）；UPDATE/DELETE 走 psycopg2 execute_batch
+    insertmanyvalues_page_size=1000,
+    executemany_mode="values_plus_batch",
+    executemany_batch_page_size=500,
+)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
 def get_session():
@@ -30,6 +48,81 @@ def get_session():
     finally:
         db.close()
 
+# 行数达到该阈值时改用 COPY 批量写入
+COPY_THRESHOLD = int(os.getenv("COPY_THRESHOLD", "500"))
+
+def _copy_value(value) -> str:
+    """转换为 COPY text 格式的字段值"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "\\N"
+    if isinstance(value, enum.Enum):
+        value = value.value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        # bytea hex 格式
+        text_value = "\\x" + bytes(value).hex()
+    elif isinstance(value, (dict, list, tuple)):
+        # JSON/JSONB 列
+        text_value = orjson.dumps(value).decode("utf-8")
+    elif hasattr(value, "isoformat"):
+        text_value = value.isoformat()
+    else:
+        text_value = str(value)
+    return (
+        text_value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+def bulk_insert_ignore(
+    session,
+    model,
+    rows: list[dict],
+    conflict_columns: list[str] | None,
+    returning: str | None = None,
+) -> list | None:
+    """批量写入，冲突行忽略
+
+    小批量使用多行 INSERT ... ON CONFLICT DO NOTHING；大批量先 COPY 到临时表，
+    再 INSERT ... SELECT ... ON CONFLICT DO NOTHING 合并到目标表。
+    conflict_columns 为 None 时忽略任意唯一约束冲突；指定 returning 时返回新插入行的该列值。
+    """
+    if not rows:
+        return [] if returning else None
+    if len(rows) < COPY_THRESHOLD:
+        stmt = pg_insert(model).values(rows).on_conflict_do_nothing(index_elements=conflict_columns)
+        if returning:
+            return session.execute(stmt.returning(model.__table__.c[returning])).scalars().all()
+        session.execute(stmt)
+        return None
+
+    table = model.__tablename__
+    staging = f"{table}_staging"
+    columns = list(rows[0].keys())
+    column_list = ", ".join(columns)
+
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join(_copy_value(row.get(c)) for c in columns))
+        buf.write("\n")
+    buf.seek(0)
+
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.execute(f"CREATE TEMP TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+        cursor.copy_expert(f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT text)", buf)
+        conflict_target = f"({', '.join(conflict_columns)}) " if conflict_columns else ""
+        cursor.execute(
+            f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging} "
+            f"ON CONFLICT {conflict_target}DO NOTHING"
+            + (f" RETURNING {returning}" if returning else "")
+        )
+        inserted = [row[0] for row in cursor.fetchall()] if returning else None
+        cursor.execute(f"DROP TABLE {staging}")
+    finally:
+        cursor.close()
+    return inserted
+
 def get_redis_client():
     """Get Redis client if Redis is available and configured"""
     if not REDIS_AVAILABLE:
@@ -0,0 +1,86 @@
+"""
+Multi-pattern keyword matching
+Aho–Corasick automaton that finds every keyword of every bucket in one pass over the text
+"""
+
+from collections import deque
+from typing import Dict, Iterable, Set, Tuple
+
+# pyahocorasick imports (optional)
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+    ahocorasick = None
+
+
+class KeywordMatcher:
+    def __init__(self, buckets: Dict[str, Iterable[str]]):
+        # keyword -> buckets it belongs to
+        self._labels: Dict[str, Tuple[str, ...]] = {}
+        for bucket, keywords in buckets.items():
+            for keyword in keywords:
+                self._labels[keyword] = self._labels.get(keyword, ()) + (bucket,)
+
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self._labels:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+        else:
+            self._automaton = None
+            self._build_trie()
+
+    def _build_trie(self):
+        """Pure-Python fallback: goto / fail / output tables"""
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for keyword in self._labels:
+            node = 0
+            for ch in keyword:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(keyword)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _iter_keywords(self, text: str) -> Iterable[str]:
+        if self._automaton is not None:
+            for _, keyword in self._automaton.iter(text):
+                yield keyword
+            return
+        node = 0
+        for ch in text:
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            yield from self._out[node]
+
+    def matches(self, text: str) -> Set[Tuple[str, str]]:
+        """
+        Return the distinct (bucket, keyword) pairs found in text.
+        """
+        hits: Set[Tuple[str, str]] = set()
+        if not text:
+            return hits
+        for keyword in self._iter_keywords(text):
+            for bucket in self._labels[keyword]:
+                hits.add((bucket, keyword))
+        return hits
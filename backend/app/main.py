@@ -1,34 +1,48 @@
 
-from fastapi import FastAPI, Depends, HTTPException, Query
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from sqlalchemy import select, text, and_
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from sqlalchemy import select, text, and_, or_, literal_column
 from sqlalchemy.dialects.postgresql import insert as pg_insert
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload, raiseload
 from typing import List, Optional
+from datetime import datetime, timedelta
+import asyncio
+import hashlib
 import json
+import orjson
 import os
 import random
-import signal
-import sys
 import time
-import tushare as ts
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from .db import SessionLocal, init_database
-from .data_source import get_stock_info, search_stocks, get_realtime_stock, fetch_daily
-from .models import Watchlist, PriceDaily, Forecast, Signal, Task, Report, TaskStatus, TaskType, Stock
-from .forecast import predict_stock_price
-from .report import generate_report_data
-from .task_manager import TaskManager
-from .scheduler import run_daily_pipeline
+from .db import SessionLocal
+from .data_source import get_stock_info
+from .models import Watchlist, Task, Report, TaskStatus, TaskType
+from .task_manager import task_manager
+from .scheduler import run_daily_pipeline, get_process_pool, shutdown_process_pool
+from .news_service import close_http_client, close_search_log_writer
+from .report import close_llm_client
+from .price_store import price_store, frame_records
 
-# 创建任务管理器实例
-task_manager = TaskManager()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 预测计算使用的进程池
+    app.state.pool = get_process_pool()
+    # 启动后台任务处理器
+    task_manager.start()
+    yield
+    task_manager.stop()
+    shutdown_process_pool()
+    await close_search_log_writer()
+    await close_http_client()
+    await close_llm_client()
 
-app = FastAPI(title="AI Stock API", version="1.1")
+app = FastAPI(title="AI Stock API", version="1.1", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -53,6 +67,48 @@ class WatchItem(BaseModel):
     sector: str | None = None
     enabled: bool = True
 
+class WatchlistItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    symbol: str
+    name: str | None = None
+    sector: str | None = None
+    enabled: bool
+
+class TaskResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    task_type: str
+    symbol: str
+    status: str
+    created_at: datetime
+    priority: int
+
+class ReportResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    version: int
+    created_at: datetime
+    is_latest: bool
+    data_quality_score: float | None = None
+    prediction_confidence: float | None = None
+    analysis_summary: str | None = None
+
+# 直接从 ORM 对象序列化列表响应
+_watchlist_adapter = TypeAdapter(List[WatchlistItem])
+_tasks_adapter = TypeAdapter(List[TaskResponse])
+_reports_adapter = TypeAdapter(List[ReportResponse])
+
+class UTCJSONResponse(ORJSONResponse):
+    """orjson 原生序列化 datetime/numpy，数据库中的无时区时间按 UTC 输出"""
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY)
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """检查客户端 If-None-Match 是否命中当前 ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return etag in (tag.strip() for tag in if_none_match.split(","))
+
 # 全局缓存股票基础数据
 _stock_basic_cache = None
 
@@ -85,6 +141,7 @@ def fetch_stock_basic_with_retry(data_source):
         if not token or token == "your_tushare_token_here":
             raise HTTPException(status_code=500, detail="TUSHARE_TOKEN not configured. Please set your token in .env file")
         
+        import tushare as ts
         ts.set_token(token)
         pro = ts.pro_api()
         return pro.stock_basic(exchange='', list_status='L', fields='ts_code,symbol,name,market')
@@ -217,31 +274,35 @@ def cache_status():
 def get_watchlist():
     with SessionLocal() as session:
         res = session.execute(select(Watchlist).where(Watchlist.enabled==True)).scalars().all()
-        return [
-            {
-                "symbol": r.symbol,
-                "name": r.name,
-                "sector": r.sector,
-                "enabled": r.enabled,
-            }
-            for r in res
-        ]
+        return _watchlist_adapter.dump_python(_watchlist_adapter.validate_python(res))
 
 
-@app.post("/watchlist")
-def add_watch(item: WatchItem):
+def _upsert_watch(item: WatchItem, sym: str) -> bool:
+    """写入或更新自选股，返回是否为新插入的行"""
     with SessionLocal() as session:
+        # xmax = 0 表示本次为新插入的行，而非冲突后的更新
         stmt = pg_insert(Watchlist).values(
-            symbol=item.symbol.upper(),
+            symbol=sym,
             name=item.name,
             sector=item.sector,
             enabled=item.enabled,
         ).on_conflict_do_update(
             index_elements=["symbol"],
             set_={"name": item.name, "sector": item.sector, "enabled": item.enabled},
-        )
-        session.execute(stmt)
+        ).returning(literal_column("xmax = 0").label("inserted"))
+        inserted = session.execute(stmt).scalar_one()
         session.commit()
+    return inserted
+
+@app.post("/watchlist")
+async def add_watch(item: WatchItem):
+    sym = item.symbol.upper()
+    # 数据库写入放到线程池，避免阻塞事件循环
+    inserted = await asyncio.to_thread(_upsert_watch, item, sym)
+    
+    # 新加入自选的股票立即排队生成报告
+    if inserted and item.enabled:
+        await task_manager.create_report_task(sym, priority=3)
     return {"ok": True}
 
 # 删除自选股接口
@@ -261,7 +322,7 @@ async def run_daily_now():
     return {"ok": ok}
 
 @app.get("/report/{symbol}")
-async def get_report(symbol: str, version: int = Query(None, description="报告版本号，默认返回最新版本")):
+async def get_report(request: Request, response: Response, symbol: str, version: int = Query(None, description="报告版本号，默认返回最新版本")):
     with SessionLocal() as session:
         sym = symbol.upper()
         
@@ -284,6 +345,12 @@ async def get_report(symbol: str, version: int = Query(None, description="报告
             report = result[0] if result else None
         
         if report:
+            # 报告按版本不可变，仅 is_latest 会变化
+            etag = f'W/"{report.symbol}-{report.version}-{int(report.is_latest)}"'
+            if etag_matches(request, etag):
+                return Response(status_code=304, headers={"ETag": etag})
+            response.headers["ETag"] = etag
+            
             # 使用报告数据
             result = {
                 "symbol": sym,
@@ -295,15 +362,15 @@ async def get_report(symbol: str, version: int = Query(None, description="报告
                 "analysis_summary": report.analysis_summary
             }
             
-            # 解析JSON数据
+            # JSONB 列已由驱动解析为 dict/list
             if report.latest_price_data:
-                result["latest"] = json.loads(report.latest_price_data)
+                result["latest"] = report.latest_price_data
             
             if report.signal_data:
-                result["signal"] = json.loads(report.signal_data)
+                result["signal"] = report.signal_data
             
             if report.forecast_data:
-                result["forecast"] = json.loads(report.forecast_data)
+                result["forecast"] = report.forecast_data
             
             return result
         
@@ -351,8 +418,14 @@ def signals_today():
         ).mappings().all()
         return [dict(r) for r in rows]
 
+_PRICE_COLUMNS = ["trade_date", "close", "open", "high", "low", "vol"]
+
 @app.get("/prices/{symbol}")
 def get_prices(symbol: str, limit: int = Query(180, ge=1, le=1000)):
+    # 行情只由日常流水线写入，写库后即刷新列式缓存；缓存缺失时回查数据库
+    cached = price_store.read(symbol.upper(), columns=_PRICE_COLUMNS)
+    if cached is not None:
+        return frame_records(cached.tail(limit))
     with SessionLocal() as session:
         rows = session.execute(
             text(
@@ -460,7 +533,7 @@ async def get_full_report(symbol: str, timeRange: str = Query('5d', description=
             
             if report and report.forecast_data and historical_prices:
                 try:
-                    forecast_data = json.loads(report.forecast_data)
+                    forecast_data = report.forecast_data
                     # forecast_data 是一个列表，直接处理
                     if isinstance(forecast_data, list) and len(forecast_data) > 0:
                         from datetime import datetime, timedelta
@@ -541,11 +614,7 @@ async def get_full_report(symbol: str, timeRange: str = Query('5d', description=
             
             # 添加技术指标信号
             if report and report.signal_data:
-                try:
-                    signal_data = json.loads(report.signal_data)
-                    result["signal"] = signal_data
-                except Exception as e:
-                    print(f"Error parsing signal data: {e}")
+                result["signal"] = report.signal_data
             
             return result
             
@@ -576,24 +645,21 @@ def get_report_history(symbol: str, limit: int = Query(10, ge=1, le=50)):
             .limit(limit)
         ).scalars().all()
         
-        return {
+        return UTCJSONResponse({
             "symbol": symbol.upper(),
-            "reports": [
-                {
-                    "version": r.version,
-                    "created_at": r.created_at.isoformat(),
-                    "is_latest": r.is_latest,
-                    "data_quality_score": float(r.data_quality_score) if r.data_quality_score else None,
-                    "prediction_confidence": float(r.prediction_confidence) if r.prediction_confidence else None,
-                    "analysis_summary": r.analysis_summary
-                }
-                for r in reports
-            ]
-        }
+            "reports": _reports_adapter.dump_python(_reports_adapter.validate_python(reports))
+        })
+
+# 状态接口会被健康探针高频调用，按秒缓存结果
+_task_status_cache = {"second": None, "data": None}
 
 @app.get("/tasks/status")
 async def get_task_status():
     """获取任务系统状态"""
+    now_second = int(time.monotonic())
+    if _task_status_cache["second"] == now_second:
+        return _task_status_cache["data"]
+    
     with SessionLocal() as session:
         # 统计各状态的任务数量
         pending_count = session.execute(
@@ -618,7 +684,7 @@ async def get_task_status():
             select(Report).where(Report.is_latest == True)
         ).scalars().all()
         
-        return {
+        data = {
             "tasks": {
                 "pending": len(pending_count),
                 "running": len(running_count),
@@ -634,51 +700,68 @@ async def get_task_status():
                 "max_concurrent": task_manager.max_concurrent_tasks
             }
         }
+    
+    _task_status_cache.update(second=now_second, data=data)
+    return data
+
+# 仪表板数据版本：报告/报告任务/自选股任一变化都会改变结果；行数用于识别删除
+_DASHBOARD_VERSION_SQL = text("""
+SELECT
+    (SELECT max(id) FROM reports) AS report_id,
+    (SELECT count(*) FROM reports) AS report_count,
+    (SELECT max(id) FROM tasks WHERE task_type = 'generate_report') AS task_id,
+    (SELECT count(*) FROM tasks WHERE task_type = 'generate_report') AS task_count,
+    (SELECT max(GREATEST(created_at, started_at, completed_at)) FROM tasks WHERE task_type = 'generate_report') AS task_ts,
+    (SELECT md5(string_agg(concat_ws('|', symbol, name, sector, enabled), ',' ORDER BY symbol)) FROM watchlist) AS watchlist_hash
+""")
+
+# 报告仪表板查询：每只自选股的最新报告和最新报告任务
+_DASHBOARD_SQL = text("""
+SELECT 
+    w.symbol,
+    w.name,
+    w.sector,
+    lr.version as latest_report_version,
+    lr.created_at as latest_report_date,
+    lr.data_quality_score,
+    lr.prediction_confidence,
+    lr.analysis_summary,
+    lt.status as task_status,
+    lt.task_created_at,
+    lt.started_at,
+    lt.completed_at,
+    lt.error_message,
+    lt.priority
+FROM watchlist w
+LEFT JOIN LATERAL (
+    SELECT version, created_at, data_quality_score, prediction_confidence, analysis_summary
+    FROM reports
+    WHERE symbol = w.symbol
+    ORDER BY version DESC
+    LIMIT 1
+) lr ON true
+LEFT JOIN LATERAL (
+    SELECT status, created_at as task_created_at, started_at, completed_at, error_message, priority
+    FROM tasks
+    WHERE symbol = w.symbol AND task_type = 'generate_report'
+    ORDER BY created_at DESC
+    LIMIT 1
+) lt ON true
+WHERE w.enabled = true
+ORDER BY w.symbol
+""")
 
 @app.get("/api/dashboard/reports")
-def get_reports_dashboard(db: Session = Depends(get_db)):
+def get_reports_dashboard(request: Request, db: Session = Depends(get_db)):
     """获取报告仪表板数据 - 按股票统计"""
     try:
-        # 获取所有股票的最新报告和任务状态
-        query = """
-        WITH latest_reports AS (
-            SELECT DISTINCT ON (symbol) 
-                symbol, version, created_at, is_latest,
-                data_quality_score, prediction_confidence, analysis_summary
-            FROM reports 
-            ORDER BY symbol, version DESC
-        ),
-        latest_tasks AS (
-            SELECT DISTINCT ON (symbol, task_type) 
-                symbol, task_type, status, created_at as task_created_at,
-                started_at, completed_at, error_message, priority
-            FROM tasks 
-            WHERE task_type = 'generate_report'
-            ORDER BY symbol, task_type, created_at DESC
-        )
-        SELECT 
-            w.symbol,
-            w.name,
-            w.sector,
-            lr.version as latest_report_version,
-            lr.created_at as latest_report_date,
-            lr.data_quality_score,
-            lr.prediction_confidence,
-            lr.analysis_summary,
-            lt.status as task_status,
-            lt.task_created_at,
-            lt.started_at,
-            lt.completed_at,
-            lt.error_message,
-            lt.priority
-        FROM watchlist w
-        LEFT JOIN latest_reports lr ON w.symbol = lr.symbol
-        LEFT JOIN latest_tasks lt ON w.symbol = lt.symbol
-        WHERE w.enabled = true
-        ORDER BY w.symbol
-        """
-        
-        result = db.execute(text(query)).fetchall()
+        # 先用轻量查询判断数据是否变化，未变化时跳过完整聚合
+        version = db.execute(_DASHBOARD_VERSION_SQL).one()
+        etag = 'W/"{}"'.format(hashlib.md5(repr(tuple(version)).encode()).hexdigest())
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        result = db.execute(_DASHBOARD_SQL).fetchall()
         
         dashboard_data = []
         for row in result:
@@ -688,22 +771,22 @@ def get_reports_dashboard(db: Session = Depends(get_db)):
                 "sector": row.sector,
                 "latest_report": {
                     "version": str(row.latest_report_version) if row.latest_report_version else None,
-                    "created_at": row.latest_report_date.isoformat() if row.latest_report_date else None,
+                    "created_at": row.latest_report_date,
                     "data_quality_score": float(row.data_quality_score) if row.data_quality_score else 0.0,
                     "prediction_confidence": float(row.prediction_confidence) if row.prediction_confidence else 0.0,
                     "analysis_summary": row.analysis_summary
                 } if row.latest_report_version else None,
                 "current_task": {
                     "status": row.task_status,
-                    "created_at": row.task_created_at.isoformat() if row.task_created_at else None,
-                    "started_at": row.started_at.isoformat() if row.started_at else None,
-                    "completed_at": row.completed_at.isoformat() if row.completed_at else None,
+                    "created_at": row.task_created_at,
+                    "started_at": row.started_at,
+                    "completed_at": row.completed_at,
                     "error_message": row.error_message,
                     "priority": row.priority
                 } if row.task_status else None
             })
         
-        return {
+        return UTCJSONResponse({
             "stocks": dashboard_data,
             "summary": {
                 "total_stocks": len(dashboard_data),
@@ -712,11 +795,19 @@ def get_reports_dashboard(db: Session = Depends(get_db)):
                 "running_tasks": len([s for s in dashboard_data if s["current_task"] and s["current_task"]["status"] == "running"]),
                 "failed_tasks": len([s for s in dashboard_data if s["current_task"] and s["current_task"]["status"] == "failed"])
             }
-        }
+        }, headers={"ETag": etag})
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+_RECENT_TASKS_SQL = text("""
+    SELECT symbol, task_type, status, created_at, completed_at, error_message
+    FROM tasks
+    WHERE created_at >= :cutoff
+    ORDER BY created_at DESC
+    LIMIT 50
+""")
+
 @app.get("/api/dashboard/tasks")
 def get_tasks_dashboard(db: Session = Depends(get_db)):
     """获取任务仪表板数据"""
@@ -729,13 +820,8 @@ def get_tasks_dashboard(db: Session = Depends(get_db)):
         """)).fetchall()
         
         # 最近24小时任务
-        recent_tasks = db.execute(text("""
-            SELECT symbol, task_type, status, created_at, completed_at, error_message
-            FROM tasks
-            WHERE created_at >= NOW() - INTERVAL '24 hours'
-            ORDER BY created_at DESC
-            LIMIT 50
-        """)).fetchall()
+        cutoff = datetime.utcnow() - timedelta(hours=24)
+        recent_tasks = db.execute(_RECENT_TASKS_SQL, {"cutoff": cutoff}).fetchall()
         
         # 任务类型统计
         type_stats = db.execute(text("""
@@ -744,7 +830,7 @@ def get_tasks_dashboard(db: Session = Depends(get_db)):
             GROUP BY task_type
         """)).fetchall()
         
-        return {
+        return UTCJSONResponse({
             "status_statistics": {row.status: row.count for row in status_stats},
             "type_statistics": {row.task_type: row.count for row in type_stats},
             "recent_tasks": [
@@ -752,22 +838,22 @@ def get_tasks_dashboard(db: Session = Depends(get_db)):
                     "symbol": row.symbol,
                     "task_type": row.task_type,
                     "status": row.status,
-                    "created_at": row.created_at.isoformat(),
-                    "completed_at": row.completed_at.isoformat() if row.completed_at else None,
+                    "created_at": row.created_at,
+                    "completed_at": row.completed_at,
                     "error_message": row.error_message
                 }
                 for row in recent_tasks
             ]
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 @app.post("/api/tasks/report/{symbol}")
-def create_report_task_api(symbol: str, priority: int = 5):
+async def create_report_task_api(symbol: str, priority: int = 5):
     """手动创建报告生成任务"""
     try:
-        task_id = task_manager.create_task(
+        task_id = await task_manager.create_task(
             task_type=TaskType.GENERATE_REPORT,
             symbol=symbol,
             priority=priority
@@ -777,7 +863,7 @@ def create_report_task_api(symbol: str, priority: int = 5):
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 @app.get("/api/tasks", response_model=List[dict])
-def list_tasks_api(status: Optional[str] = None, symbol: Optional[str] = None, db: Session = Depends(get_db)):
+def list_tasks_api(status: Optional[TaskStatus] = None, symbol: Optional[str] = None, db: Session = Depends(get_db)):
     """列出任务"""
     try:
         query = select(Task)
@@ -791,24 +877,14 @@ def list_tasks_api(status: Optional[str] = None, symbol: Optional[str] = None, d
         
         tasks = db.execute(query).scalars().all()
         
-        return [
-            {
-                "id": task.id,
-                "task_type": task.task_type,
-                "symbol": task.symbol,
-                "status": task.status,
-                "created_at": task.created_at.isoformat(),
-                "priority": task.priority
-            }
-            for task in tasks
-        ]
+        return UTCJSONResponse(_tasks_adapter.dump_python(_tasks_adapter.validate_python(tasks)))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 # ================ NEWS API ENDPOINTS ================
 
-from .news_service import NewsSearchService, NewsProcessor, NewsScheduler
-from .models import NewsArticle, NewsSource, SearchLog, NewsCategory, SentimentType
+from .news_service import NewsSearchService, NewsProcessor, NewsScheduler, save_articles, canonical_url
+from .models import NewsArticle, NewsArticleStock, NewsSource, SearchLog, NewsCategory, SentimentType
 
 # Initialize news services
 news_search_service = NewsSearchService()
@@ -892,60 +968,57 @@ async def get_stock_news(symbol: str, limit: int = Query(20, ge=1, le=100)):
         # Format response articles list
         response_articles = []
         
-        # Save to database and build response
+        # Save to database in one batch; duplicates (url / canonical url / content) are skipped by the unique indexes
         session = SessionLocal()
         try:
-            for i, article in enumerate(articles[:limit]):
-                try:
-                    print(f"💾 Processing article {i+1}: {article.title[:50]}...")
-                    
-                    # Check if article exists
-                    existing = session.execute(
-                        select(NewsArticle).where(NewsArticle.url == article.url)
-                    ).scalar_one_or_none()
-                    
-                    current_article = None
-                    if not existing:
-                        print(f"  ✅ New article, saving...")
-                        session.add(article)
-                        session.commit()
-                        session.refresh(article)
-                        current_article = article
-                    else:
-                        print(f"  ♻️ Article exists, using existing...")
-                        current_article = existing
-                    
-                    # Build article response data
-                    source_name = "Unknown"
-                    if current_article.source_id:
-                        if hasattr(current_article, 'source') and current_article.source:
-                            source_name = current_article.source.name
-                        else:
-                            # Load source if not loaded
-                            session.refresh(current_article)
-                            if hasattr(current_article, 'source') and current_article.source:
-                                source_name = current_article.source.name
-                    
-                    article_data = {
-                        "id": current_article.id,
-                        "title": current_article.title,
-                        "url": current_article.url,
-                        "summary": current_article.summary or "",
-                        "published_at": current_article.published_at.isoformat() if current_article.published_at else None,
-                        "source": source_name,
-                        "sentiment_type": current_article.sentiment_type,
-                        "sentiment_score": current_article.sentiment_score,
-                        "relevance_score": current_article.relevance_score,
-                        "related_stocks": current_article.related_stocks or []
-                    }
-                    
-                    response_articles.append(article_data)
-                    print(f"  📄 Added to response")
-                    
-                except Exception as e:
-                    print(f"❌ Error processing article: {e}")
-                    session.rollback()
+            inserted = save_articles(session, articles)
+            session.commit()
+            print(f"💾 Saved {inserted} new articles")
+            
+            # Load the stored rows for the response in a single query. process_search_results skips
+            # URLs that are already stored, so look up every search result URL, not only the new articles.
+            result_urls = [result["url"] for result in results if result.get("url")]
+            canonical_urls = [canonical_url(url) for url in result_urls]
+            hashes = [article["content_hash"] for article in articles if article["content_hash"]]
+            stored = session.execute(
+                select(NewsArticle).where(or_(
+                    NewsArticle.url.in_(result_urls),
+                    NewsArticle.canonical_url.in_(canonical_urls),
+                    NewsArticle.content_hash.in_(hashes),
+                ))
+            ).scalars().all()
+            by_url = {row.url: row for row in stored}
+            by_canonical = {row.canonical_url: row for row in stored if row.canonical_url}
+            by_hash = {row.content_hash: row for row in stored if row.content_hash}
+            new_by_url = {article["url"]: article for article in articles}
+            
+            seen_ids = set()
+            for url, canonical in zip(result_urls, canonical_urls):
+                if len(response_articles) >= limit:
+                    break
+                new_article = new_by_url.get(url)
+                current_article = (
+                    by_url.get(url)
+                    or by_canonical.get(canonical)
+                    or (by_hash.get(new_article["content_hash"]) if new_article is not None else None)
+                )
+                if current_article is None or current_article.id in seen_ids:
                     continue
+                seen_ids.add(current_article.id)
+                
+                article_data = {
+                    "id": current_article.id,
+                    "title": current_article.title,
+                    "url": current_article.url,
+                    "summary": current_article.summary or "",
+                    "published_at": current_article.published_at.isoformat() if current_article.published_at else None,
+                    "source": current_article.source.name if current_article.source else "Unknown",
+                    "sentiment_type": current_article.sentiment_type,
+                    "sentiment_score": current_article.sentiment_score,
+                    "relevance_score": current_article.relevance_score,
+                    "related_stocks": current_article.related_stocks or []
+                }
+                response_articles.append(article_data)
                     
         finally:
             session.close()
@@ -981,7 +1054,10 @@ async def get_news_articles(
     Get news articles with filtering
     """
     try:
-        query = select(NewsArticle).join(NewsSource)
+        # 来源批量加载；其他关系禁止懒加载，避免 N+1
+        query = select(NewsArticle).join(NewsSource).options(
+            selectinload(NewsArticle.source), raiseload("*")
+        )
         
         # Apply filters
         if category:
@@ -1076,9 +1152,10 @@ async def collect_news_for_stock(symbol: str, db: Session = Depends(get_db)):
             })
         )
         db.add(task)
-        db.commit()
-        db.refresh(task)
+        db.flush()
         task_id = task.id
+        db.commit()
+        await task_manager.enqueue(task_id, 3)
         
         return {
             "message": f"News collection task created for {symbol}",
@@ -1210,13 +1287,16 @@ async def get_stock_sentiment(symbol: str, db: Session = Depends(get_db), days:
         
         since_date = datetime.utcnow() - timedelta(days=days)
         
-        query = select(NewsArticle).where(
+        # 股票-文章关联表上按 (symbol, published_at) 索引范围扫描
+        query = select(NewsArticle).join(
+            NewsArticleStock, NewsArticleStock.article_id == NewsArticle.id
+        ).where(
             and_(
-                NewsArticle.related_stocks.contains([symbol]),
-                NewsArticle.published_at >= since_date,
+                NewsArticleStock.symbol == symbol,
+                NewsArticleStock.published_at >= since_date,
                 NewsArticle.sentiment_score.isnot(None)
             )
-        ).order_by(NewsArticle.published_at.desc())
+        ).order_by(NewsArticleStock.published_at.desc())
         
         articles = db.execute(query).scalars().all()
         
@@ -1,9 +1,13 @@
 
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, Boolean, Date, BigInteger, Numeric, TIMESTAMP, Text, Index, Float, ForeignKey, JSON
+from sqlalchemy import Enum as SAEnum, String, Integer, Boolean, Date, BigInteger, TIMESTAMP, Text, Index, Float, ForeignKey, LargeBinary, Computed, DDL, TypeDecorator, event, text
+from sqlalchemy.dialects.postgresql import JSONB
 import datetime
 from enum import Enum
 
+# 时间列保持无时区 UTC 语义，由数据库在写入时填充
+UTC_NOW = text("(now() AT TIME ZONE 'utc')")
+
 class TaskStatus(str, Enum):
     PENDING = "pending"
     RUNNING = "running"
@@ -30,6 +34,24 @@ class SentimentType(str, Enum):
     NEGATIVE = "negative"
     NEUTRAL = "neutral"
 
+def pg_enum(enum_cls, name: str) -> SAEnum:
+    """Postgres 原生 ENUM，按枚举值（而非成员名）存储"""
+    return SAEnum(enum_cls, name=name, native_enum=True, values_callable=lambda e: [m.value for m in e])
+
+class InternedEnum(TypeDecorator):
+    """VARCHAR 存储的枚举值；读取时映射到枚举值常量，同值行共享同一个 str 对象"""
+    impl = String
+    cache_ok = True
+
+    def __init__(self, enum_cls, length: int = 50):
+        super().__init__(length)
+        self.enum_cls = enum_cls
+        self.length = length
+        self._values = {e.value: e.value for e in enum_cls}
+
+    def process_result_value(self, value, dialect):
+        return self._values.get(value, value)
+
 class Base(DeclarativeBase):
     pass
 
@@ -48,22 +70,37 @@ class Stock(Base):
     name: Mapped[str] = mapped_column(String(64))
     sector: Mapped[str | None] = mapped_column(String(64), nullable=True)
     market: Mapped[str | None] = mapped_column(String(16), nullable=True)
-    created_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, default=datetime.datetime.utcnow)
+    created_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, server_default=UTC_NOW)
 
 class PriceDaily(Base):
     __tablename__ = "prices_daily"
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    # 按 trade_date 范围分区，主键须包含分区键
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     symbol: Mapped[str] = mapped_column(String(16))
-    trade_date: Mapped[datetime.date] = mapped_column(Date)
-    open: Mapped[float | None] = mapped_column(Numeric)
-    high: Mapped[float | None] = mapped_column(Numeric)
-    low: Mapped[float | None] = mapped_column(Numeric)
-    close: Mapped[float | None] = mapped_column(Numeric)
-    pre_close: Mapped[float | None] = mapped_column(Numeric)
-    change: Mapped[float | None] = mapped_column(Numeric)
-    pct_chg: Mapped[float | None] = mapped_column(Numeric)
+    trade_date: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    # 距 1970-01-01 的天数，批量读取时可直接转为 datetime64[D]
+    trade_day: Mapped[int] = mapped_column(Integer, Computed("trade_date - DATE '1970-01-01'", persisted=True))
+    open: Mapped[float | None] = mapped_column(Float)
+    high: Mapped[float | None] = mapped_column(Float)
+    low: Mapped[float | None] = mapped_column(Float)
+    close: Mapped[float | None] = mapped_column(Float)
+    pre_close: Mapped[float | None] = mapped_column(Float)
+    change: Mapped[float | None] = mapped_column(Float)
+    pct_chg: Mapped[float | None] = mapped_column(Float)
     vol: Mapped[int | None]
-    amount: Mapped[float | None] = mapped_column(Numeric)
+    amount: Mapped[float | None] = mapped_column(Float)
+
+    __table_args__ = (
+        Index('ix_prices_symbol_date', 'symbol', 'trade_date', unique=True),
+        {'postgresql_partition_by': 'RANGE (trade_date)'},
+    )
+
+# create_all 只建父表；默认分区兜底，年度分区由 initdb 脚本创建
+event.listen(
+    PriceDaily.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS prices_daily_default PARTITION OF prices_daily DEFAULT"),
+)
 
 class Forecast(Base):
     __tablename__ = "forecasts"
@@ -72,29 +109,37 @@ class Forecast(Base):
     run_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP)
     target_date: Mapped[datetime.date] = mapped_column(Date)
     model: Mapped[str] = mapped_column(String(32))
-    yhat: Mapped[float | None] = mapped_column(Numeric)
-    yhat_lower: Mapped[float | None] = mapped_column(Numeric)
-    yhat_upper: Mapped[float | None] = mapped_column(Numeric)
+    yhat: Mapped[float | None] = mapped_column(Float)
+    yhat_lower: Mapped[float | None] = mapped_column(Float)
+    yhat_upper: Mapped[float | None] = mapped_column(Float)
+
+    __table_args__ = (
+        Index('ix_forecast_symbol_target', 'symbol', 'target_date'),
+    )
 
 class Signal(Base):
     __tablename__ = "signals"
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     symbol: Mapped[str] = mapped_column(String(16))
     trade_date: Mapped[datetime.date] = mapped_column(Date)
-    ma_short: Mapped[float | None] = mapped_column(Numeric)
-    ma_long: Mapped[float | None] = mapped_column(Numeric)
-    rsi: Mapped[float | None] = mapped_column(Numeric)
-    macd: Mapped[float | None] = mapped_column(Numeric)
-    signal_score: Mapped[float | None] = mapped_column(Numeric)
-    action: Mapped[str] = mapped_column(String(100))
+    ma_short: Mapped[float | None] = mapped_column(Float)
+    ma_long: Mapped[float | None] = mapped_column(Float)
+    rsi: Mapped[float | None] = mapped_column(Float)
+    macd: Mapped[float | None] = mapped_column(Float)
+    signal_score: Mapped[float | None] = mapped_column(Float)
+    action: Mapped[str] = mapped_column(String(16))  # BUY / HOLD / TRIM
+
+    __table_args__ = (
+        Index('ix_signals_symbol_date', 'symbol', 'trade_date', unique=True),
+    )
 
 class Task(Base):
     __tablename__ = "tasks"
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
-    task_type: Mapped[str] = mapped_column(String(32))  # TaskType
+    task_type: Mapped[TaskType] = mapped_column(pg_enum(TaskType, 'task_type_enum'))
     symbol: Mapped[str] = mapped_column(String(16))
-    status: Mapped[str] = mapped_column(String(16), default=TaskStatus.PENDING)  # TaskStatus
-    created_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, default=datetime.datetime.utcnow)
+    status: Mapped[TaskStatus] = mapped_column(pg_enum(TaskStatus, 'task_status_enum'), default=TaskStatus.PENDING)
+    created_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, server_default=UTC_NOW)
     started_at: Mapped[datetime.datetime | None] = mapped_column(TIMESTAMP, nullable=True)
     completed_at: Mapped[datetime.datetime | None] = mapped_column(TIMESTAMP, nullable=True)
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -102,8 +147,10 @@ class Task(Base):
     task_metadata: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON string for additional params
 
     __table_args__ = (
-        Index('idx_task_status_priority', 'status', 'priority'),
+        # 队列扫描只关心 pending 任务，部分索引保持很小
+        Index('idx_task_pending_priority', 'priority', 'created_at', postgresql_where=text("status = 'pending'")),
         Index('idx_task_symbol_type', 'symbol', 'task_type'),
+        Index('tasks_created_at_brin', 'created_at', postgresql_using='brin'),
     )
 
 class Report(Base):
@@ -111,21 +158,22 @@ class Report(Base):
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     symbol: Mapped[str] = mapped_column(String(16))
     version: Mapped[int] = mapped_column(Integer, default=1)
-    created_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, default=datetime.datetime.utcnow)
+    created_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, server_default=UTC_NOW)
     is_latest: Mapped[bool] = mapped_column(Boolean, default=True)
     
     # Report content
-    latest_price_data: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON
-    signal_data: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON
-    forecast_data: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON
+    latest_price_data: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    signal_data: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    forecast_data: Mapped[list | None] = mapped_column(JSONB, nullable=True)  # List of forecast points
     analysis_summary: Mapped[str | None] = mapped_column(Text, nullable=True)
     
     # Metrics
-    data_quality_score: Mapped[float | None] = mapped_column(Numeric, nullable=True)
-    prediction_confidence: Mapped[float | None] = mapped_column(Numeric, nullable=True)
+    data_quality_score: Mapped[float | None] = mapped_column(Float, nullable=True)
+    prediction_confidence: Mapped[float | None] = mapped_column(Float, nullable=True)
     
     __table_args__ = (
-        Index('idx_report_symbol_latest', 'symbol', 'is_latest'),
+        # 每个股票至多一份最新报告；部分索引只包含 is_latest 行
+        Index('uq_report_symbol_latest', 'symbol', unique=True, postgresql_where=text('is_latest')),
         Index('idx_report_symbol_version', 'symbol', 'version'),
     )
 
@@ -134,11 +182,11 @@ class NewsSource(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100))
     domain: Mapped[str] = mapped_column(String(255), unique=True)
-    category: Mapped[str] = mapped_column(String(50))  # NewsCategory
+    category: Mapped[str] = mapped_column(InternedEnum(NewsCategory, 50))
     reliability_score: Mapped[float] = mapped_column(Float, default=0.5)
     language: Mapped[str] = mapped_column(String(10), default="zh-CN")
     enabled: Mapped[bool] = mapped_column(Boolean, default=True)
-    created_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, default=datetime.datetime.utcnow)
+    created_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, server_default=UTC_NOW)
     
     # Relationships
     articles = relationship("NewsArticle", back_populates="source")
@@ -148,45 +196,65 @@ class NewsArticle(Base):
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     title: Mapped[str] = mapped_column(String(500))
     url: Mapped[str] = mapped_column(String(1000), unique=True)
+    canonical_url: Mapped[str | None] = mapped_column(String(1000), nullable=True)  # URL without tracking params, for dedup
     content: Mapped[str | None] = mapped_column(Text, nullable=True)
+    content_hash: Mapped[bytes | None] = mapped_column(LargeBinary(20), nullable=True)  # SHA-1 of normalized content
     summary: Mapped[str | None] = mapped_column(String(1000), nullable=True)
     author: Mapped[str | None] = mapped_column(String(100), nullable=True)
     
     # News metadata
     published_at: Mapped[datetime.datetime | None] = mapped_column(TIMESTAMP, nullable=True)
-    crawled_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, default=datetime.datetime.utcnow)
+    crawled_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, server_default=UTC_NOW)
     source_id: Mapped[int] = mapped_column(ForeignKey("news_sources.id"))
     
     # Content analysis
-    category: Mapped[str] = mapped_column(String(50))  # NewsCategory
-    keywords: Mapped[str | None] = mapped_column(JSON, nullable=True)  # List of keywords
-    entities: Mapped[str | None] = mapped_column(JSON, nullable=True)  # Named entities
+    category: Mapped[NewsCategory] = mapped_column(pg_enum(NewsCategory, 'news_category_enum'))
+    keywords: Mapped[str | None] = mapped_column(JSONB, nullable=True)  # List of keywords
+    entities: Mapped[str | None] = mapped_column(JSONB, nullable=True)  # Named entities
     
     # Sentiment analysis
-    sentiment_type: Mapped[str | None] = mapped_column(String(20), nullable=True)  # SentimentType
+    sentiment_type: Mapped[SentimentType | None] = mapped_column(pg_enum(SentimentType, 'sentiment_type_enum'), nullable=True)
     sentiment_score: Mapped[float | None] = mapped_column(Float, nullable=True)  # -1 to 1
     sentiment_confidence: Mapped[float | None] = mapped_column(Float, nullable=True)
     
     # Stock relevance
-    from sqlalchemy.dialects.postgresql import JSONB
     related_stocks: Mapped[str | None] = mapped_column(JSONB, nullable=True)  # List of stock symbols
     relevance_score: Mapped[float | None] = mapped_column(Float, nullable=True)  # 0 to 1
     
     # Quality metrics
     content_quality: Mapped[float | None] = mapped_column(Float, nullable=True)
     is_duplicate: Mapped[bool] = mapped_column(Boolean, default=False)
-    duplicate_of: Mapped[int | None] = mapped_column(ForeignKey("news_articles.id"), nullable=True)
     
     # Relationships
-    source = relationship("NewsSource", back_populates="articles")
+    source = relationship("NewsSource", back_populates="articles", lazy="selectin")
     
     __table_args__ = (
         Index('idx_news_published_at', 'published_at'),
         Index('idx_news_category', 'category'),
         Index('idx_news_sentiment', 'sentiment_type', 'sentiment_score'),
-    Index('idx_news_stocks', 'related_stocks', postgresql_using='gin', postgresql_ops={"related_stocks": "jsonb_path_ops"}),
+        Index('idx_news_stocks', 'related_stocks', postgresql_using='gin', postgresql_ops={"related_stocks": "jsonb_path_ops"}),
+        Index('idx_news_keywords_gin', 'keywords', postgresql_using='gin', postgresql_ops={"keywords": "jsonb_path_ops"}),
         Index('idx_news_source_published', 'source_id', 'published_at'),
         Index('idx_news_quality', 'content_quality', 'is_duplicate'),
+        Index('ix_news_content_hash', 'content_hash', unique=True),
+        Index('ix_news_canonical_url', 'canonical_url', unique=True),
+    )
+
+class NewsDuplicate(Base):
+    """重复文章到原始文章的映射，仅在检测到重复时写入"""
+    __tablename__ = "news_duplicates"
+    article_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("news_articles.id", ondelete="CASCADE"), primary_key=True)
+    canonical_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("news_articles.id", ondelete="CASCADE"))
+
+class NewsArticleStock(Base):
+    """related_stocks 展开后的股票-文章关联，用于按股票的新闻时间线查询"""
+    __tablename__ = "news_article_stocks"
+    article_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("news_articles.id", ondelete="CASCADE"), primary_key=True)
+    symbol: Mapped[str] = mapped_column(String(16), primary_key=True)
+    published_at: Mapped[datetime.datetime | None] = mapped_column(TIMESTAMP, nullable=True)
+
+    __table_args__ = (
+        Index('ix_nas_symbol_date', 'symbol', 'published_at'),
     )
 
 class NewsKeyword(Base):
@@ -215,7 +283,7 @@ class SearchLog(Base):
     processing_time: Mapped[float | None] = mapped_column(Float, nullable=True)
     success: Mapped[bool] = mapped_column(Boolean, default=True)
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
-    created_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, default=datetime.datetime.utcnow)
+    created_at: Mapped[datetime.datetime] = mapped_column(TIMESTAMP, server_default=UTC_NOW)
     
     __table_args__ = (
         Index('idx_search_query_type', 'query_type', 'created_at'),
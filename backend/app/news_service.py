@@ -5,30 +5,361 @@ Integrates with SearXNG for multi-source news aggregation
 
 import asyncio
 import hashlib
-import json
+import importlib.util
+import orjson
 import os
 import re
+from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
-from urllib.parse import urljoin, urlparse
+from typing import List, Optional, Dict, Any, DefaultDict
+from urllib.parse import urljoin, urlparse, urlunparse
 
 import httpx
-from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+from sqlalchemy import select, func, or_, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from .models import (
     NewsArticle, NewsSource, NewsKeyword, SearchLog, 
     NewsCategory, SentimentType, Watchlist
 )
-from .db import get_session
+from .db import get_session, bulk_insert_ignore
+from .keyword_matcher import KeywordMatcher
+
+# 预编译的正则与日期格式
+WS_RE = re.compile(r'\s+')
+# 股票代码：优先用 RE2（线性时间 DFA），否则退回标准库；两者都按 ASCII 判定单词边界，
+# 因此紧贴中文的代码（如“股票600519.SH”）也能匹配
+STOCK_CODE_PATTERN = r'(?i)\b([0-9]{6})\.(SH|SZ)\b'
+try:
+    import re2
+    STOCK_RE = re2.compile(STOCK_CODE_PATTERN)
+except ImportError:
+    STOCK_RE = re.compile(STOCK_CODE_PATTERN, re.ASCII)
+# ISO-8601 由 datetime.fromisoformat 直接解析，其余格式逐个尝试
+DATE_FORMATS = (
+    "%d/%m/%Y",
+)
+
+# 正文提取：先去掉非正文节点，再按优先级查找正文容器
+_STRIP_NODES_XPATH = etree.XPath("//script|//style|//nav|//header|//footer|//aside")
+_CONTENT_XPATHS = [
+    etree.XPath(path) for path in (
+        "//article",
+        "//*[contains(concat(' ', normalize-space(@class), ' '), ' content ')]",
+        "//*[contains(concat(' ', normalize-space(@class), ' '), ' article-content ')]",
+        "//*[contains(concat(' ', normalize-space(@class), ' '), ' post-content ')]",
+        "//*[@id='content']",
+        "//main",
+    )
+]
+
+
+def _element_text(element) -> str:
+    return " ".join(part.strip() for part in element.itertext() if part.strip())
+
+
+# trafilatura imports (optional)
+try:
+    import trafilatura
+    TRAFILATURA_AVAILABLE = True
+except ImportError:
+    TRAFILATURA_AVAILABLE = False
+    trafilatura = None
+
+
+def _lxml_extract(body: bytes) -> str:
+    """Selector-based main-text extraction; fallback when trafilatura is missing or finds nothing"""
+    # Raw bytes let lxml honour the page's declared charset
+    tree = lxml_html.fromstring(body)
+    
+    # Remove script and style elements
+    for node in _STRIP_NODES_XPATH(tree):
+        node.drop_tree()
+    
+    # Try to find main content
+    for xpath in _CONTENT_XPATHS:
+        elements = xpath(tree)
+        if elements:
+            content = _element_text(elements[0])
+            if content:
+                return content
+            break
+    
+    # Fallback to body content
+    return _element_text(tree)
+
+
+# pybloom-live imports (optional)
+try:
+    from pybloom_live import ScalableBloomFilter
+    BLOOM_AVAILABLE = True
+except ImportError:
+    BLOOM_AVAILABLE = False
+    ScalableBloomFilter = None
+
+
+# 内容分析关键词；所有分组合并为一个自动机，一次扫描得到全部命中
+FINANCE_KEYWORDS = ("股票", "投资", "市场", "交易", "涨跌", "利润", "财报", "业绩")
+POSITIVE_WORDS = frozenset(["上涨", "增长", "利好", "盈利", "突破", "看好"])
+NEGATIVE_WORDS = frozenset(["下跌", "亏损", "利空", "风险", "暴跌", "看空"])
+CONTENT_MATCHER = KeywordMatcher({
+    "finance": FINANCE_KEYWORDS,
+    "positive": POSITIVE_WORDS,
+    "negative": NEGATIVE_WORDS,
+})
+# 标题与正文均无关键词命中时的分析结果
+_EMPTY_ANALYSIS = {
+    "category": NewsCategory.FINANCE.value,
+    "keywords": [],
+    "entities": [],
+    "sentiment_type": SentimentType.NEUTRAL.value,
+    "sentiment_score": 0.0,
+    "sentiment_confidence": 0.7,
+    "relevance_score": 0.0,
+    "content_quality": 0.3,
+}
+# 域名特征：财经类域名、中文站点
+DOMAIN_MATCHER = KeywordMatcher({
+    "finance": ["finance", "money", "economic", "stock", "投资", "财经"],
+    "zh": ["cn", "com.cn", "sina", "163", "qq", "sohu"],
+})
+
+# 已知来源的可信度评分，其余域名取默认值
+RELIABLE_DOMAINS = {
+    "reuters.com": 0.9,
+    "bloomberg.com": 0.9,
+    "finance.sina.com.cn": 0.8,
+    "eastmoney.com": 0.85,
+    "cnbc.com": 0.85,
+    "ft.com": 0.9,
+}
+DEFAULT_RELIABILITY = 0.6
+
+# 所有新闻服务共用一个连接池；安装 h2 时启用 HTTP/2 多路复用
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+HTTP_CONNECT_RETRIES = int(os.getenv("NEWS_HTTP_CONNECT_RETRIES", "1"))
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        # One explicit transport owns the connection pool; host lookups go through anyio's
+        # threaded getaddrinfo, so DNS never blocks the event loop. retries re-attempts failed connects.
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(max_connections=1000, max_keepalive_connections=100, keepalive_expiry=30),
+            http2=HTTP2_AVAILABLE,
+            retries=HTTP_CONNECT_RETRIES,
+        )
+        _http_client = httpx.AsyncClient(
+            transport=transport,
+            timeout=30.0,
+            follow_redirects=True,
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+# 搜索日志：请求路径只入队，后台任务每 SEARCH_LOG_FLUSH_INTERVAL 秒或满 SEARCH_LOG_BATCH 条批量写入
+SEARCH_LOG_BATCH = 100
+SEARCH_LOG_FLUSH_INTERVAL = 0.5
+_search_log_queue: Optional[asyncio.Queue] = None
+_search_log_task: Optional[asyncio.Task] = None
+
+
+def enqueue_search_log(row: Dict[str, Any]):
+    global _search_log_queue, _search_log_task
+    if _search_log_queue is None:
+        _search_log_queue = asyncio.Queue()
+    if _search_log_task is None or _search_log_task.done():
+        _search_log_task = asyncio.create_task(_drain_search_logs(_search_log_queue))
+    _search_log_queue.put_nowait(row)
+
+
+def _write_search_logs(rows: List[Dict[str, Any]]):
+    from .db import SessionLocal
+    session = SessionLocal()
+    try:
+        session.execute(pg_insert(SearchLog), rows)
+        session.commit()
+    finally:
+        session.close()
+
+
+async def _flush_search_logs(rows: List[Dict[str, Any]]):
+    try:
+        await asyncio.to_thread(_write_search_logs, rows)
+    except Exception:
+        # Database unavailable - log to console instead
+        for row in rows:
+            print(f"🔍 Search Log (DB unavailable): query='{row['query']}', results={row['results_count']}, success={row['success']}")
+            if row["error_message"]:
+                print(f"   Error: {row['error_message']}")
+
+
+async def _drain_search_logs(queue: asyncio.Queue):
+    loop = asyncio.get_running_loop()
+    while True:
+        rows = [await queue.get()]
+        deadline = loop.time() + SEARCH_LOG_FLUSH_INTERVAL
+        try:
+            while len(rows) < SEARCH_LOG_BATCH:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    rows.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Shutting down: write what was already taken off the queue
+            await _flush_search_logs(rows)
+            raise
+        await _flush_search_logs(rows)
+
+
+async def close_search_log_writer():
+    """Stop the background writer and flush whatever is still queued"""
+    global _search_log_queue, _search_log_task
+    if _search_log_task is not None:
+        _search_log_task.cancel()
+        try:
+            await _search_log_task
+        except asyncio.CancelledError:
+            pass
+        _search_log_task = None
+    if _search_log_queue is not None:
+        rows = []
+        while not _search_log_queue.empty():
+            rows.append(_search_log_queue.get_nowait())
+        if rows:
+            await _flush_search_logs(rows)
+        _search_log_queue = None
+
+
+class RateLimiter:
+    """
+    Spaces acquisitions at least period/rate seconds apart across all callers
+    """
+    def __init__(self, rate: float, period: float = 1.0):
+        self._interval = period / rate
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+    
+    async def __aenter__(self):
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self._interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+# SearXNG 请求限速（每秒次数），取代调用方之间的固定等待
+SEARCH_RATE_LIMITER = RateLimiter(float(os.getenv("SEARXNG_RATE_LIMIT", "5")))
+
+# 并发抓取文章正文 / 并发收集股票新闻的上限
+ARTICLE_FETCH_CONCURRENCY = int(os.getenv("NEWS_FETCH_CONCURRENCY", "5"))
+STOCK_COLLECT_CONCURRENCY = int(os.getenv("NEWS_STOCK_CONCURRENCY", "3"))
+# 正文页面下载上限；超过即放弃（多为 PDF、视频等大文件）
+MAX_ARTICLE_BYTES = 5_000_000
+# 同一站点同时抓取的上限（与浏览器每主机连接数一致）
+HOST_FETCH_CONCURRENCY = int(os.getenv("NEWS_HOST_CONCURRENCY", "6"))
+# 每批写入的文章行数；达到 COPY_THRESHOLD 的批次走 COPY
+ARTICLE_INSERT_CHUNK = 5000
+# id 与 crawled_at 由数据库生成
+_ARTICLE_COLUMNS = [c.key for c in NewsArticle.__table__.columns if c.key not in ("id", "crawled_at")]
+
+
+def content_hash(content: Optional[str]) -> Optional[bytes]:
+    """SHA-1 of content with whitespace removed and lowercased, for duplicate detection"""
+    if not content:
+        return None
+    normalized = "".join(content.split()).lower()
+    return hashlib.sha1(normalized.encode("utf-8")).digest()
+
+
+# 去重时丢弃的跟踪参数前缀与默认端口
+_TRACKING_PARAM_PREFIXES = ("utm_", "fbclid", "gclid", "mc_")
+_DEFAULT_PORTS = {"http": ":80", "https": ":443"}
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalize a URL so tracking-parameter and formatting permutations of the same page compare equal:
+    lowercase scheme/host, drop default port, fragment, tracking params and trailing slash, sort the query.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+    default_port = _DEFAULT_PORTS.get(scheme)
+    if default_port and netloc.endswith(default_port):
+        netloc = netloc[:-len(default_port)]
+    query = "&".join(sorted(
+        param for param in parsed.query.split("&")
+        if param and not param.lower().startswith(_TRACKING_PARAM_PREFIXES)
+    ))
+    return urlunparse((scheme, netloc, parsed.path.rstrip("/") or "/", "", query, ""))
+
+
+def url_digest(url: str) -> bytes:
+    """128-bit digest of a URL, used as a compact dedup key"""
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+
+
+_LINK_ARTICLE_STOCKS_SQL = text("""
+INSERT INTO news_article_stocks (article_id, symbol, published_at)
+SELECT a.id, s.symbol, a.published_at
+FROM news_articles a
+CROSS JOIN LATERAL jsonb_array_elements_text(a.related_stocks) AS s(symbol)
+WHERE a.id = ANY(:ids) AND jsonb_typeof(a.related_stocks) = 'array' AND length(s.symbol) <= 16
+ON CONFLICT DO NOTHING
+""")
+
+
+def link_article_stocks(session: Session, article_ids: List[int]):
+    """
+    Expand related_stocks of the given articles into news_article_stocks rows.
+    """
+    if article_ids:
+        session.execute(_LINK_ARTICLE_STOCKS_SQL, {"ids": list(article_ids)})
+
+
+def save_articles(session: Session, rows: List[Dict[str, Any]]) -> int:
+    """
+    Bulk insert article rows (as built by NewsProcessor), skipping rows whose url or content_hash already exists.
+    Returns the number of newly inserted rows.
+    """
+    inserted = 0
+    for start in range(0, len(rows), ARTICLE_INSERT_CHUNK):
+        # 大批量走 COPY + 临时表合并，小批量为多行 INSERT；任一唯一约束冲突均跳过
+        article_ids = bulk_insert_ignore(
+            session, NewsArticle, rows[start:start + ARTICLE_INSERT_CHUNK], None, returning="id"
+        )
+        link_article_stocks(session, article_ids)
+        inserted += len(article_ids)
+    return inserted
 
 
 class NewsSearchService:
     def __init__(self, searxng_url: str = None):
         self.searxng_url = searxng_url or os.getenv("SEARXNG_URL", "http://localhost:10000")
         self.timeout = int(os.getenv("SEARXNG_TIMEOUT", "30"))
-        self.http_client = httpx.AsyncClient(timeout=self.timeout)
+    
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        return get_http_client()
         
     async def search_news(
         self, 
@@ -55,13 +386,15 @@ class NewsSearchService:
         results = []
         
         try:
-            response = await self.http_client.post(
-                f"{self.searxng_url}/search",
-                data=search_params
-            )
+            async with SEARCH_RATE_LIMITER:
+                response = await self.http_client.post(
+                    f"{self.searxng_url}/search",
+                    data=search_params,
+                    timeout=self.timeout
+                )
             response.raise_for_status()
             
-            data = response.json()
+            data = orjson.loads(response.content)
             results = data.get("results", [])[:max_results]
             
             # Log search
@@ -119,8 +452,11 @@ class NewsSearchService:
         unique_results = []
         for result in all_results:
             url = result.get("url", "")
-            if url and url not in seen_urls:
-                seen_urls.add(url)
+            if not url:
+                continue
+            key = url_digest(canonical_url(url))
+            if key not in seen_urls:
+                seen_urls.add(key)
                 unique_results.append(result)
                 
         return unique_results[:20]
@@ -152,53 +488,119 @@ class NewsSearchService:
         success: bool,
         error_message: str = None
     ):
-        """Log search operation - safe fallback when database unavailable"""
-        try:
+        """Queue a search log row; written in batches by the background writer"""
+        enqueue_search_log({
+            "query": query,
+            "query_type": query_type,
+            "source_engine": source_engine,
+            "results_count": results_count,
+            "processing_time": processing_time,
+            "success": success,
+            "error_message": error_message,
+        })
+
+
+class NewsProcessor:
+    def __init__(self, use_seen_filter: bool = False):
+        # domain -> news_sources.id; sources are never deleted, so ids stay valid for the process lifetime
+        self._source_cache: Dict[str, int] = {}
+        # per-host fetch limits, on top of the global ARTICLE_FETCH_CONCURRENCY bound
+        self._host_sems: DefaultDict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(HOST_FETCH_CONCURRENCY)
+        )
+        # Bloom filter of canonical URLs already stored, for long-lived processors;
+        # seeded from the database on first use
+        self._use_seen_filter = use_seen_filter and BLOOM_AVAILABLE
+        self._seen: Optional["ScalableBloomFilter"] = None
+        self._seen_lock = asyncio.Lock()
+    
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        return get_http_client()
+    
+    async def process_search_results(self, results: List[Dict[str, Any]], related_symbol: str = None) -> List[Dict[str, Any]]:
+        """
+        Process search results into news_articles row dicts, ready for save_articles
+        """
+        # Skip URLs already stored before fetching anything. A Bloom miss means the URL is
+        # certainly new, so only Bloom hits need the database check.
+        seen_filter = await self._seen_filter()
+        candidates = results
+        if seen_filter is not None:
+            candidates = [
+                result for result in results
+                if result.get("url") and canonical_url(result["url"]) in seen_filter
+            ]
+        seen_urls = set()
+        if candidates:
             from .db import SessionLocal
             session = SessionLocal()
             try:
-                search_log = SearchLog(
-                    query=query,
-                    query_type=query_type,
-                    source_engine=source_engine,
-                    results_count=results_count,
-                    processing_time=processing_time,
-                    success=success,
-                    error_message=error_message
-                )
-                session.add(search_log)
-                session.commit()
+                seen_urls = await self.prefilter(candidates, session)
             finally:
                 session.close()
-        except Exception as db_error:
-            # Database unavailable - log to console instead
-            print(f"🔍 Search Log (DB unavailable): query='{query}', results={results_count}, success={success}")
-            if error_message:
-                print(f"   Error: {error_message}")
-            # Don't raise exception - continue without database logging
-
-
-class NewsProcessor:
-    def __init__(self):
-        self.http_client = httpx.AsyncClient(timeout=30.0)
+        results = [
+            result for result in results
+            if result.get("url")
+            and result["url"] not in seen_urls
+            and canonical_url(result["url"]) not in seen_urls
+        ]
+        
+        sem = asyncio.Semaphore(ARTICLE_FETCH_CONCURRENCY)
+        
+        async def bounded(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            async with sem:
+                try:
+                    return await self._process_single_result(result, related_symbol)
+                except Exception as e:
+                    print(f"Failed to process article {result.get('url', '')}: {e}")
+                    return None
+        
+        processed = await asyncio.gather(*(bounded(result) for result in results))
+        return [article for article in processed if article]
+    
+    async def _seen_filter(self) -> Optional["ScalableBloomFilter"]:
+        if not self._use_seen_filter:
+            return None
+        async with self._seen_lock:
+            if self._seen is None:
+                try:
+                    self._seen = await asyncio.to_thread(self._load_seen_filter)
+                except Exception as e:
+                    print(f"Failed to seed seen-URL filter: {e}")
+                    return None
+        return self._seen
     
-    async def process_search_results(self, results: List[Dict[str, Any]], related_symbol: str = None) -> List[NewsArticle]:
+    def _load_seen_filter(self) -> "ScalableBloomFilter":
+        seen = ScalableBloomFilter(initial_capacity=100_000, error_rate=0.001)
+        from .db import SessionLocal
+        session = SessionLocal()
+        try:
+            rows = session.execute(
+                select(NewsArticle.url, NewsArticle.canonical_url).execution_options(yield_per=10_000)
+            )
+            for url, canonical in rows:
+                seen.add(canonical or canonical_url(url))
+        finally:
+            session.close()
+        return seen
+    
+    async def prefilter(self, results: List[Dict[str, Any]], session: Session) -> set:
         """
-        Process search results and create NewsArticle objects
+        Return the raw and canonical URLs of results that already exist in news_articles, in one query
         """
-        articles = []
-        
-        for result in results:
-            try:
-                article = await self._process_single_result(result, related_symbol)
-                if article:
-                    articles.append(article)
-            except Exception as e:
-                print(f"Failed to process article {result.get('url', '')}: {e}")
-                
-        return articles
+        urls = {result["url"] for result in results if result.get("url")}
+        if not urls:
+            return set()
+        canonical_urls = {canonical_url(url) for url in urls}
+        stmt = select(NewsArticle.url, NewsArticle.canonical_url).where(or_(
+            NewsArticle.url.in_(list(urls)),
+            NewsArticle.canonical_url.in_(list(canonical_urls)),
+        ))
+        existing = await asyncio.to_thread(lambda: session.execute(stmt).all())
+        return {url for row in existing for url in row if url}
     
-    async def _process_single_result(self, result: Dict[str, Any], related_symbol: str = None) -> Optional[NewsArticle]:
+    async def _process_single_result(self, result: Dict[str, Any], related_symbol: str = None) -> Optional[Dict[str, Any]]:
         """
         Process a single search result
         """
@@ -207,37 +609,27 @@ class NewsProcessor:
         
         if not url or not title:
             return None
-            
-        # Check if article already exists
-        from .db import SessionLocal
-        session = SessionLocal()
-        try:
-            existing = session.execute(
-                select(NewsArticle).where(NewsArticle.url == url)
-            ).scalar_one_or_none()
-            
-            if existing:
-                return existing
-        finally:
-            session.close()
         
         # Extract content
         content = await self._extract_content(url)
         
         # Get or create news source
-        source = await self._get_or_create_source(url)
+        source_id = await self._get_or_create_source(url)
         
         # Analyze content
         analysis = await self._analyze_content(title, content)
         
-        # Create article
-        article = NewsArticle(
+        # Build the row as a plain dict; bulk ingest goes through a Core insert, no ORM instances
+        article = dict.fromkeys(_ARTICLE_COLUMNS)
+        article.update(
             title=title,
             url=url,
+            canonical_url=canonical_url(url),
             content=content,
+            content_hash=content_hash(content),
             summary=self._generate_summary(content),
             published_at=self._parse_published_date(result.get("publishedDate")),
-            source_id=source.id,
+            source_id=source_id,
             category=analysis.get("category", NewsCategory.FINANCE.value),
             keywords=analysis.get("keywords", []),
             entities=analysis.get("entities", []),
@@ -246,9 +638,13 @@ class NewsProcessor:
             sentiment_confidence=analysis.get("sentiment_confidence"),
             related_stocks=self._extract_related_stocks(title, content, related_symbol),
             relevance_score=analysis.get("relevance_score", 0.5),
-            content_quality=analysis.get("content_quality", 0.5)
+            content_quality=analysis.get("content_quality", 0.5),
+            is_duplicate=False,
         )
         
+        if self._seen is not None:
+            self._seen.add(article["canonical_url"])
+        
         return article
     
     async def _extract_content(self, url: str) -> Optional[str]:
@@ -256,80 +652,107 @@ class NewsProcessor:
         Extract article content from URL
         """
         try:
-            response = await self.http_client.get(url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "header", "footer", "aside"]):
-                script.decompose()
-            
-            # Try to find main content
-            content_selectors = [
-                "article", 
-                ".content", 
-                ".article-content",
-                ".post-content",
-                "#content",
-                "main"
-            ]
-            
-            content = ""
-            for selector in content_selectors:
-                element = soup.select_one(selector)
-                if element:
-                    content = element.get_text(strip=True)
-                    break
+            async with self._host_sems[urlparse(url).netloc]:
+                body = await self._fetch_html(url)
+            if body is None:
+                return None
             
+            content = None
+            if TRAFILATURA_AVAILABLE:
+                # Single boilerplate-removal pass tuned for news pages
+                content = trafilatura.extract(
+                    body,
+                    include_comments=False,
+                    include_tables=False,
+                    favor_precision=True,
+                )
             if not content:
-                # Fallback to body content
-                content = soup.get_text(strip=True)
+                content = _lxml_extract(body)
             
             # Clean up content
-            content = re.sub(r'\s+', ' ', content)
+            content = WS_RE.sub(' ', content)
             return content[:5000]  # Limit content length
             
         except Exception as e:
             print(f"Failed to extract content from {url}: {e}")
             return None
     
-    async def _get_or_create_source(self, url: str) -> NewsSource:
+    async def _fetch_html(self, url: str) -> Optional[bytes]:
+        """
+        Download an HTML page, giving up early on non-HTML content types and bodies over MAX_ARTICLE_BYTES
+        """
+        async with self.http_client.stream("GET", url) as response:
+            response.raise_for_status()
+            
+            content_type = response.headers.get("content-type", "").lower()
+            if content_type and "html" not in content_type:
+                return None
+            if int(response.headers.get("content-length") or 0) > MAX_ARTICLE_BYTES:
+                return None
+            
+            # Content-Length may be absent (chunked), so enforce the cap while reading too
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) > MAX_ARTICLE_BYTES:
+                    return None
+            return bytes(body)
+    
+    async def _get_or_create_source(self, url: str) -> int:
         """
-        Get or create news source from URL
+        Get or create news source from URL, returning its id
         """
         domain = urlparse(url).netloc
+        source_id = self._source_cache.get(domain)
+        if source_id is not None:
+            return source_id
         
+        source_id = await asyncio.to_thread(self._load_or_create_source, domain)
+        self._source_cache[domain] = source_id
+        return source_id
+    
+    def _load_or_create_source(self, domain: str) -> int:
+        """
+        Blocking part of _get_or_create_source; runs in a worker thread.
+        ON CONFLICT keeps concurrent first sightings of a domain from colliding.
+        """
         from .db import SessionLocal
         session = SessionLocal()
         try:
-            source = session.execute(
-                select(NewsSource).where(NewsSource.domain == domain)
+            source_id = session.execute(
+                select(NewsSource.id).where(NewsSource.domain == domain)
             ).scalar_one_or_none()
             
-            if not source:
+            if source_id is None:
                 # Create new source
-                source = NewsSource(
-                    name=domain,
-                    domain=domain,
-                    category=self._categorize_domain(domain),
-                    reliability_score=self._assess_reliability(domain),
-                    language="zh-CN" if any(x in domain for x in ["cn", "com.cn", "sina", "163", "qq", "sohu"]) else "en"
+                domain_hits = {bucket for bucket, _ in DOMAIN_MATCHER.matches(domain.lower())}
+                session.execute(
+                    pg_insert(NewsSource)
+                    .values(
+                        name=domain,
+                        domain=domain,
+                        category=self._categorize_domain(domain, domain_hits),
+                        reliability_score=self._assess_reliability(domain),
+                        language="zh-CN" if "zh" in domain_hits else "en"
+                    )
+                    .on_conflict_do_nothing(index_elements=[NewsSource.domain])
                 )
-                session.add(source)
                 session.commit()
-                session.refresh(source)
+                source_id = session.execute(
+                    select(NewsSource.id).where(NewsSource.domain == domain)
+                ).scalar_one()
             
-            return source
+            return source_id
         finally:
             session.close()
     
-    def _categorize_domain(self, domain: str) -> str:
+    def _categorize_domain(self, domain: str, domain_hits: set = None) -> str:
         """
         Categorize domain based on known patterns
         """
-        finance_domains = ["finance", "money", "economic", "stock", "投资", "财经"]
-        if any(keyword in domain.lower() for keyword in finance_domains):
+        if domain_hits is None:
+            domain_hits = {bucket for bucket, _ in DOMAIN_MATCHER.matches(domain.lower())}
+        if "finance" in domain_hits:
             return NewsCategory.FINANCE.value
         return NewsCategory.FINANCE.value  # Default to finance
     
@@ -337,32 +760,26 @@ class NewsProcessor:
         """
         Assess domain reliability score
         """
-        reliable_domains = {
-            "reuters.com": 0.9,
-            "bloomberg.com": 0.9,
-            "finance.sina.com.cn": 0.8,
-            "eastmoney.com": 0.85,
-            "cnbc.com": 0.85,
-            "ft.com": 0.9
-        }
-        return reliable_domains.get(domain, 0.6)
+        return RELIABLE_DOMAINS.get(domain, DEFAULT_RELIABILITY)
     
     async def _analyze_content(self, title: str, content: str) -> Dict[str, Any]:
         """
         Analyze content for sentiment, keywords, etc.
         """
-        # Simple keyword extraction
-        finance_keywords = ["股票", "投资", "市场", "交易", "涨跌", "利润", "财报", "业绩"]
+        # Extraction failed: only the title is left to scan, and most titles hit nothing
+        if not content:
+            hits = CONTENT_MATCHER.matches(title)
+            if not hits:
+                return {**_EMPTY_ANALYSIS, "keywords": [], "entities": []}
+        else:
+            hits = CONTENT_MATCHER.matches(f"{title} {content}")
         
-        text = f"{title} {content or ''}"
-        found_keywords = [kw for kw in finance_keywords if kw in text]
+        # Simple keyword extraction
+        found_keywords = [kw for kw in FINANCE_KEYWORDS if ("finance", kw) in hits]
         
         # Simple sentiment analysis
-        positive_words = ["上涨", "增长", "利好", "盈利", "突破", "看好"]
-        negative_words = ["下跌", "亏损", "利空", "风险", "暴跌", "看空"]
-        
-        positive_count = sum(1 for word in positive_words if word in text)
-        negative_count = sum(1 for word in negative_words if word in text)
+        positive_count = sum(1 for bucket, _ in hits if bucket == "positive")
+        negative_count = sum(1 for bucket, _ in hits if bucket == "negative")
         
         if positive_count > negative_count:
             sentiment_type = SentimentType.POSITIVE.value
@@ -393,9 +810,8 @@ class NewsProcessor:
         text = f"{title} {content or ''}"
         
         # Pattern for Chinese stock codes
-        stock_pattern = r'\b\d{6}\.(SH|SZ)\b'
-        matches = re.findall(stock_pattern, text, re.IGNORECASE)
-        stocks.extend([f"{match[0]}.{match[1]}" for match in matches])
+        matches = STOCK_RE.findall(text)
+        stocks.extend([f"{code}.{exchange.upper()}" for code, exchange in matches])
         
         if hint_symbol:
             stocks.append(hint_symbol)
@@ -409,15 +825,19 @@ class NewsProcessor:
         if not content:
             return ""
         
-        sentences = content.split('。')
-        summary = ""
-        for sentence in sentences:
-            if len(summary + sentence) <= max_length:
-                summary += sentence + "。"
-            else:
+        # Walk sentence ends only within the first max_length characters
+        end = 0
+        while True:
+            nxt = content.find('。', end, max_length + 1)
+            if nxt < 0:
                 break
+            end = nxt + 1
         
-        return summary.strip()
+        # A short trailing fragment without a full stop still fits
+        if len(content) <= max_length and content[end:].strip():
+            return (content + "。").strip()
+        
+        return content[:end].strip()
     
     def _parse_published_date(self, date_str: str) -> Optional[datetime]:
         """
@@ -426,50 +846,52 @@ class NewsProcessor:
         if not date_str:
             return None
         
+        # ISO-8601 covers the common forms (with/without time, offset or 'Z')
         try:
-            # Try common date formats
-            formats = [
-                "%Y-%m-%dT%H:%M:%S%z",
-                "%Y-%m-%d %H:%M:%S",
-                "%Y-%m-%d",
-                "%d/%m/%Y",
-            ]
-            
-            for fmt in formats:
-                try:
-                    return datetime.strptime(date_str, fmt)
-                except ValueError:
-                    continue
-                    
-        except Exception:
+            return datetime.fromisoformat(date_str)
+        except (TypeError, ValueError):
             pass
         
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(date_str, fmt)
+            except (TypeError, ValueError):
+                continue
+        
         return None
 
 
 class NewsScheduler:
     def __init__(self):
         self.search_service = NewsSearchService()
-        self.processor = NewsProcessor()
+        self.processor = NewsProcessor(use_seen_filter=True)
     
     async def run_scheduled_news_collection(self):
         """
         Run scheduled news collection for all watchlist stocks
         """
+        # Get all enabled stocks
+        stocks = await asyncio.to_thread(self._load_watchlist)
+        
+        # Rate limiting: at most STOCK_COLLECT_CONCURRENCY stocks in flight
+        sem = asyncio.Semaphore(STOCK_COLLECT_CONCURRENCY)
+        
+        async def bounded(symbol: str, name: Optional[str]):
+            async with sem:
+                try:
+                    await self._collect_news_for_stock(symbol, name)
+                except Exception as e:
+                    print(f"Failed to collect news for {symbol}: {e}")
+        
+        await asyncio.gather(*(bounded(symbol, name) for symbol, name in stocks))
+    
+    def _load_watchlist(self):
         from .db import SessionLocal
         session = SessionLocal()
         try:
-            # Get all enabled stocks
-            stocks = session.execute(
-                select(Watchlist).where(Watchlist.enabled == True)
-            ).scalars().all()
-            
-            for stock in stocks:
-                try:
-                    await self._collect_news_for_stock(stock.symbol, stock.name)
-                    await asyncio.sleep(1)  # Rate limiting
-                except Exception as e:
-                    print(f"Failed to collect news for {stock.symbol}: {e}")
+            return session.execute(
+                select(Watchlist.symbol, Watchlist.name).where(Watchlist.enabled == True)
+            ).all()
         finally:
             session.close()
     
@@ -484,21 +906,13 @@ class NewsScheduler:
         articles = await self.processor.process_search_results(results, symbol)
         
         # Save to database
+        await asyncio.to_thread(self._store_articles, articles)
+    
+    def _store_articles(self, articles: List[Dict[str, Any]]):
         from .db import SessionLocal
         session = SessionLocal()
         try:
-            for article in articles:
-                try:
-                    # Check for duplicates
-                    existing = session.execute(
-                        select(NewsArticle).where(NewsArticle.url == article.url)
-                    ).scalar_one_or_none()
-                    
-                    if not existing:
-                        session.add(article)
-                except Exception as e:
-                    print(f"Failed to save article {article.url}: {e}")
-            
+            save_articles(session, articles)
             session.commit()
         finally:
             session.close()
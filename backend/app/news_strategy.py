@@ -5,17 +5,71 @@
 
 import asyncio
 import json
-from datetime import datetime, timedelta
+import os
+import zlib
+from datetime import date, datetime, timedelta
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, func, and_, or_, text
 
 from .models import (
     Watchlist, NewsKeyword, NewsArticle, SearchLog, 
     NewsCategory, TaskType, Task, TaskStatus
 )
 from .db import get_session, SessionLocal
-from .news_service import NewsSearchService, NewsProcessor
+from .news_service import NewsSearchService, NewsProcessor, save_articles
+
+
+# 预定义的行业关键词映射
+INDUSTRY_KEYWORDS = {
+    "新能源": ("新能源", "电动汽车", "锂电池", "充电桩", "光伏", "风能", "储能"),
+    "医药": ("医药", "生物医药", "疫苗", "创新药", "医疗器械", "CRO"),
+    "科技": ("芯片", "半导体", "人工智能", "云计算", "5G", "物联网"),
+    "金融": ("银行", "保险", "证券", "基金", "金融科技", "数字货币"),
+    "消费": ("白酒", "食品饮料", "零售", "电商", "品牌消费"),
+    "制造": ("机械", "汽车", "家电", "建材", "化工", "钢铁"),
+    "房地产": ("房地产", "物业管理", "建筑", "装修", "城市更新"),
+    "能源": ("石油", "天然气", "煤炭", "新能源", "电力"),
+}
+# 行业策略中与行业词组合的政策相关词
+INDUSTRY_POLICY_WORDS = ("政策", "规划", "支持", "发展", "监管", "标准")
+# 政策关键词
+POLICY_KEYWORDS = (
+    "央行", "货币政策", "财政政策", "降准", "降息", "监管",
+    "国务院", "发改委", "工信部", "证监会", "银保监会",
+    "十四五", "碳中和", "双碳", "数字经济", "内循环",
+)
+# 市场整体关键词
+MARKET_KEYWORDS = (
+    "A股", "上证指数", "深证成指", "创业板", "科创板",
+    "股市", "大盘", "市场行情", "资金流向", "北向资金",
+    "机构调研", "基金持仓", "券商", "投资策略",
+)
+
+# 同时执行的策略数
+STRATEGY_CONCURRENCY = int(os.getenv("NEWS_STRATEGY_CONCURRENCY", "4"))
+# 单个策略内同时进行的关键词搜索数
+STRATEGY_SEARCH_CONCURRENCY = int(os.getenv("NEWS_STRATEGY_SEARCH_CONCURRENCY", "3"))
+
+
+# 各类别搜索查询的修饰词
+_QUERY_MODIFIERS = {
+    "company": ("股票", "公司", "业绩", "财报"),
+    "industry": ("行业", "发展", "趋势", "政策"),
+    "policy": ("政策", "监管", "新规"),
+    "market": ("市场", "行情", "分析"),
+}
+_DEFAULT_QUERY_MODIFIERS = ("财经", "新闻")
+
+
+# 启用股票的内容指纹（代码、名称、行业），用于判断是否需要重新生成策略
+_WATCHLIST_FINGERPRINT_SQL = text("""
+SELECT md5(coalesce(string_agg(symbol || '|' || coalesce(name, '') || '|' || coalesce(sector, ''), ',' ORDER BY symbol), ''))
+FROM watchlist
+WHERE enabled
+""")
+# 最近一次生成的 (指纹, 策略列表)
+_strategy_cache: Optional[tuple] = None
 
 
 class NewsStrategy:
@@ -45,32 +99,23 @@ class IntelligentNewsCollector:
         self.search_service = NewsSearchService()
         self.processor = NewsProcessor()
         
-        # 预定义的行业关键词映射
-        self.industry_keywords = {
-            "新能源": ["新能源", "电动汽车", "锂电池", "充电桩", "光伏", "风能", "储能"],
-            "医药": ["医药", "生物医药", "疫苗", "创新药", "医疗器械", "CRO"],
-            "科技": ["芯片", "半导体", "人工智能", "云计算", "5G", "物联网"],
-            "金融": ["银行", "保险", "证券", "基金", "金融科技", "数字货币"],
-            "消费": ["白酒", "食品饮料", "零售", "电商", "品牌消费"],
-            "制造": ["机械", "汽车", "家电", "建材", "化工", "钢铁"],
-            "房地产": ["房地产", "物业管理", "建筑", "装修", "城市更新"],
-            "能源": ["石油", "天然气", "煤炭", "新能源", "电力"]
-        }
-        
-        # 政策关键词
-        self.policy_keywords = [
-            "央行", "货币政策", "财政政策", "降准", "降息", "监管",
-            "国务院", "发改委", "工信部", "证监会", "银保监会",
-            "十四五", "碳中和", "双碳", "数字经济", "内循环"
-        ]
+        # 模块级常量，实例间共享
+        self.industry_keywords = INDUSTRY_KEYWORDS
+        self.policy_keywords = POLICY_KEYWORDS
     
     async def generate_strategies(self) -> List[NewsStrategy]:
         """
         基于当前关注股票自动生成新闻搜索策略
         """
+        global _strategy_cache
         strategies = []
         
         with SessionLocal() as session:
+            # 策略只取决于启用股票的代码/名称/行业；指纹未变时直接复用上次生成的策略
+            fingerprint = session.execute(_WATCHLIST_FINGERPRINT_SQL).scalar()
+            if _strategy_cache is not None and _strategy_cache[0] == fingerprint:
+                return list(_strategy_cache[1])
+            
             # 获取所有启用的股票
             watchlist = session.execute(
                 select(Watchlist).where(Watchlist.enabled == True)
@@ -100,7 +145,8 @@ class IntelligentNewsCollector:
             market_strategy = self._create_market_strategy()
             strategies.append(market_strategy)
         
-        return strategies
+        _strategy_cache = (fingerprint, strategies)
+        return list(strategies)
     
     async def _create_stock_strategy(self, stock: Watchlist) -> Optional[NewsStrategy]:
         """为单只股票创建搜索策略"""
@@ -116,11 +162,12 @@ class IntelligentNewsCollector:
         
         # 添加行业相关词
         if stock.sector:
-            keywords.extend(self.industry_keywords.get(stock.sector, []))
+            keywords.extend(self.industry_keywords.get(stock.sector, ()))
         
         return NewsStrategy(
             name=f"个股-{stock.symbol}",
-            keywords=keywords,
+            # 去重并保持顺序，避免同一关键词重复搜索（如简化名与全称相同、代码与行业词重合）
+            keywords=list(dict.fromkeys(keywords)),
             search_frequency=4,  # 每4小时
             priority=8,  # 高优先级
             category="company",
@@ -141,16 +188,15 @@ class IntelligentNewsCollector:
     
     def _create_industry_strategy(self, industry: str) -> Optional[NewsStrategy]:
         """为行业创建搜索策略"""
-        keywords = self.industry_keywords.get(industry, [])
+        keywords = self.industry_keywords.get(industry, ())
         if not keywords:
             return None
         
         # 添加行业政策相关词
-        policy_words = ["政策", "规划", "支持", "发展", "监管", "标准"]
         extended_keywords = []
         for keyword in keywords[:3]:  # 选择前3个主要关键词
             extended_keywords.append(keyword)
-            for policy_word in policy_words:
+            for policy_word in INDUSTRY_POLICY_WORDS:
                 extended_keywords.append(f"{keyword} {policy_word}")
         
         return NewsStrategy(
@@ -181,15 +227,9 @@ class IntelligentNewsCollector:
     
     def _create_market_strategy(self) -> NewsStrategy:
         """创建市场整体策略"""
-        market_keywords = [
-            "A股", "上证指数", "深证成指", "创业板", "科创板",
-            "股市", "大盘", "市场行情", "资金流向", "北向资金",
-            "机构调研", "基金持仓", "券商", "投资策略"
-        ]
-        
         return NewsStrategy(
             name="市场动态",
-            keywords=market_keywords,
+            keywords=MARKET_KEYWORDS,
             search_frequency=12,  # 每12小时
             priority=5,
             category="market",
@@ -199,13 +239,19 @@ class IntelligentNewsCollector:
             }
         )
     
-    async def execute_strategy(self, strategy: NewsStrategy) -> Dict[str, Any]:
-        """执行单个搜索策略"""
+    async def execute_strategy(
+        self,
+        strategy: NewsStrategy,
+        last_runs: Optional[Dict[str, datetime]] = None
+    ) -> Dict[str, Any]:
+        """执行单个搜索策略；last_runs 为预取的各策略最近执行时间，缺省时单独查询"""
         collected_articles = []
         total_results = 0
         
         # 检查上次执行时间
-        if not await self._should_execute_strategy(strategy):
+        if last_runs is None:
+            last_runs = self.load_last_runs([strategy])
+        if not self._should_execute_strategy(strategy, last_runs):
             return {
                 "strategy": strategy.name,
                 "status": "skipped",
@@ -214,12 +260,14 @@ class IntelligentNewsCollector:
             }
         
         try:
-            # 为每个关键词组合执行搜索
-            for i, keyword in enumerate(strategy.keywords):
-                if i >= 5:  # 限制每个策略最多搜索5个关键词
-                    break
-                
-                try:
+            # 为每个关键词组合执行搜索；限制每个策略最多搜索5个关键词
+            keywords = strategy.keywords[:5]
+            max_results = strategy.search_params.get("max_results", 10) // max(len(keywords), 1)
+            # 信号量限制同时发往 SearXNG 的请求数，取代逐个搜索间的固定等待
+            sem = asyncio.Semaphore(STRATEGY_SEARCH_CONCURRENCY)
+            
+            async def search_keyword(keyword: str):
+                async with sem:
                     # 构建搜索查询
                     query = self._build_search_query(keyword, strategy.category)
                     
@@ -228,24 +276,29 @@ class IntelligentNewsCollector:
                         query=query,
                         category="news",
                         time_range=strategy.search_params.get("time_range", "week"),
-                        max_results=strategy.search_params.get("max_results", 10) // len(strategy.keywords[:5])
+                        max_results=max_results
                     )
                     
                     # 处理结果
+                    articles = []
                     if results:
                         articles = await self.processor.process_search_results(
                             results, 
                             strategy.search_params.get("related_symbol")
                         )
-                        collected_articles.extend(articles)
-                        total_results += len(results)
-                    
-                    # 避免请求过于频繁
-                    await asyncio.sleep(1)
-                    
-                except Exception as e:
-                    print(f"Error searching for keyword '{keyword}': {e}")
+                    return results, articles
+            
+            outcomes = await asyncio.gather(
+                *(search_keyword(keyword) for keyword in keywords),
+                return_exceptions=True
+            )
+            for keyword, outcome in zip(keywords, outcomes):
+                if isinstance(outcome, Exception):
+                    print(f"Error searching for keyword '{keyword}': {outcome}")
                     continue
+                results, articles = outcome
+                collected_articles.extend(articles)
+                total_results += len(results)
             
             # 保存文章到数据库
             saved_count = await self._save_articles(collected_articles, strategy)
@@ -272,73 +325,63 @@ class IntelligentNewsCollector:
     
     def _build_search_query(self, keyword: str, category: str) -> str:
         """构建搜索查询"""
-        base_query = keyword
-        
         # 根据类别添加修饰词
-        if category == "company":
-            modifiers = ["股票", "公司", "业绩", "财报"]
-        elif category == "industry":
-            modifiers = ["行业", "发展", "趋势", "政策"]
-        elif category == "policy":
-            modifiers = ["政策", "监管", "新规"]
-        elif category == "market":
-            modifiers = ["市场", "行情", "分析"]
-        else:
-            modifiers = ["财经", "新闻"]
+        modifiers = _QUERY_MODIFIERS.get(category, _DEFAULT_QUERY_MODIFIERS)
         
-        # 随机选择一个修饰词
-        import random
-        modifier = random.choice(modifiers)
+        # 按 (关键词, 类别, 日期) 稳定轮换修饰词：同一天内相同请求得到相同查询，可命中 SearXNG 缓存
+        seed = zlib.crc32(f"{keyword}|{category}|{date.today().isoformat()}".encode("utf-8"))
+        modifier = modifiers[seed % len(modifiers)]
         
-        return f"{base_query} {modifier}"
+        return f"{keyword} {modifier}"
     
-    async def _should_execute_strategy(self, strategy: NewsStrategy) -> bool:
-        """检查策略是否应该执行"""
+    @staticmethod
+    def _log_query(strategy: NewsStrategy) -> str:
+        return f"Strategy: {strategy.name}"
+    
+    def load_last_runs(self, strategies: List[NewsStrategy]) -> Dict[str, datetime]:
+        """一次查询取出各策略最近一次执行时间，键为策略名"""
+        names = {self._log_query(strategy): strategy.name for strategy in strategies}
+        if not names:
+            return {}
         session = SessionLocal()
         try:
-            # 查找最近的执行记录
-            recent_search = session.execute(
-                select(SearchLog).where(
-                    and_(
-                        SearchLog.query.contains(strategy.name),
-                        SearchLog.created_at >= datetime.utcnow() - timedelta(hours=strategy.search_frequency)
-                    )
-                ).order_by(SearchLog.created_at.desc()).limit(1)
-            ).scalar_one_or_none()
-            
-            return recent_search is None
+            rows = session.execute(
+                select(SearchLog.query, func.max(SearchLog.created_at))
+                .where(SearchLog.query.in_(list(names)))
+                .group_by(SearchLog.query)
+            ).all()
         finally:
             session.close()
+        return {names[query]: last_run for query, last_run in rows}
+    
+    def _should_execute_strategy(self, strategy: NewsStrategy, last_runs: Dict[str, datetime]) -> bool:
+        """检查策略是否应该执行"""
+        last_run = last_runs.get(strategy.name)
+        return last_run is None or last_run < datetime.utcnow() - timedelta(hours=strategy.search_frequency)
     
-    async def _save_articles(self, articles: List[NewsArticle], strategy: NewsStrategy) -> int:
+    async def _save_articles(self, articles: List[Dict[str, Any]], strategy: NewsStrategy) -> int:
         """保存文章到数据库"""
         saved_count = 0
         
+        # 不同关键词的搜索可能返回同一文章，写入前按规范化 URL 去重（保留首次出现）
+        unique_articles: Dict[str, Dict[str, Any]] = {}
+        for article in articles:
+            unique_articles.setdefault(article["canonical_url"] or article["url"], article)
+        
+        # 添加策略信息到关键词中（已存在的文章按 url 冲突跳过，不受影响）
+        articles = [
+            {**article, "keywords": list(article["keywords"] or []) + [f"strategy:{strategy.name}"]}
+            for article in unique_articles.values()
+        ]
+        
         session = SessionLocal()
         try:
-            for article in articles:
-                try:
-                    # 检查是否已存在
-                    existing = session.execute(
-                        select(NewsArticle).where(NewsArticle.url == article.url)
-                    ).scalar_one_or_none()
-                    
-                    if not existing:
-                        # 添加策略信息到关键词中
-                        if not article.keywords:
-                            article.keywords = []
-                        article.keywords.append(f"strategy:{strategy.name}")
-                        
-                        session.add(article)
-                        saved_count += 1
-                        
-                except Exception as e:
-                    print(f"Error saving article {article.url}: {e}")
-                    session.rollback()
-                    continue
-            
+            saved_count = save_articles(session, articles)
             if saved_count > 0:
                 session.commit()
+        except Exception as e:
+            print(f"Error saving articles: {e}")
+            session.rollback()
         finally:
             session.close()
         
@@ -355,7 +398,7 @@ class IntelligentNewsCollector:
         session = SessionLocal()
         try:
             search_log = SearchLog(
-                query=f"Strategy: {strategy.name}",
+                query=self._log_query(strategy),
                 query_type="auto_strategy",
                 source_engine="searxng",
                 results_count=results_count,
@@ -391,15 +434,19 @@ class NewsStrategyScheduler:
         
         print(f"📋 生成了 {len(strategies)} 个搜索策略")
         
-        # 执行策略
-        results = []
+        # 执行策略：SearXNG 请求由 SEARCH_RATE_LIMITER 统一限速，策略之间无需固定间隔
         total_articles = 0
+        last_runs = self.collector.load_last_runs(strategies)
+        sem = asyncio.Semaphore(STRATEGY_CONCURRENCY)
         
-        for strategy in strategies:
-            print(f"🔍 执行策略: {strategy.name}")
-            result = await self.collector.execute_strategy(strategy)
-            results.append(result)
-            
+        async def run_strategy(strategy: NewsStrategy) -> Dict[str, Any]:
+            async with sem:
+                print(f"🔍 执行策略: {strategy.name}")
+                return await self.collector.execute_strategy(strategy, last_runs)
+        
+        results = await asyncio.gather(*(run_strategy(strategy) for strategy in strategies))
+        
+        for strategy, result in zip(strategies, results):
             if result["status"] == "success":
                 total_articles += result["articles_collected"]
                 print(f"✅ {strategy.name}: 收集了 {result['articles_collected']} 篇文章")
@@ -407,9 +454,6 @@ class NewsStrategyScheduler:
                 print(f"⏭️  {strategy.name}: 跳过执行（频率限制）")
             else:
                 print(f"❌ {strategy.name}: 执行失败 - {result.get('error', '未知错误')}")
-            
-            # 策略间隔
-            await asyncio.sleep(2)
         
         print(f"🎉 智能新闻收集完成！总共收集了 {total_articles} 篇文章")
         
@@ -438,9 +482,10 @@ class NewsStrategyScheduler:
                 })
             )
             session.add(task)
+            session.flush()
+            task_id = task.id
             session.commit()
-            session.refresh(task)
             
-            return task.id
+            return task_id
         finally:
             session.close()
@@ -0,0 +1,112 @@
+"""
+Columnar price cache
+Per-symbol Parquet snapshots of prices_daily for analytics reads; Postgres remains the source of truth
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# pyarrow imports (optional)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    pa = None
+    pq = None
+
+PRICE_STORE_DIR = os.getenv("PRICE_STORE_DIR", "data/prices")
+# 最近写入的历史在进程内保留的秒数，期间读取不再访问磁盘
+PRICE_CACHE_TTL = float(os.getenv("PRICE_CACHE_TTL", "300"))
+PRICE_CACHE_MAXSIZE = 256
+
+
+class PriceStore:
+    def __init__(self, root: str = None, ttl: float = PRICE_CACHE_TTL):
+        self.root = root or PRICE_STORE_DIR
+        self.ttl = ttl
+        # symbol -> (写入时间, 完整历史)
+        self._recent: Dict[str, Tuple[float, pd.DataFrame]] = {}
+        # 流水线在多个线程中并发写入
+        self._lock = threading.Lock()
+
+    def _remember(self, symbol: str, df: pd.DataFrame):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._recent.pop(symbol, None)
+            if len(self._recent) >= PRICE_CACHE_MAXSIZE:
+                # 按插入顺序淘汰最早写入的股票
+                del self._recent[next(iter(self._recent))]
+            self._recent[symbol] = (time.monotonic(), df)
+
+    def _recall(self, symbol: str) -> Optional[pd.DataFrame]:
+        entry = self._recent.get(symbol)
+        if entry is None:
+            return None
+        stored_at, df = entry
+        if time.monotonic() - stored_at > self.ttl:
+            with self._lock:
+                if self._recent.get(symbol) is entry:
+                    del self._recent[symbol]
+            return None
+        return df
+
+    def path_for(self, symbol: str) -> str:
+        return os.path.join(self.root, f"{symbol}.parquet")
+
+    def write(self, symbol: str, df: pd.DataFrame) -> bool:
+        """
+        Replace the symbol's snapshot with the full price history in df.
+        Written to a temp file and renamed so readers never see a partial file.
+        The frame is also kept in memory for PRICE_CACHE_TTL seconds; every write
+        replaces it, so a fresh insert never leaves a stale entry behind.
+        """
+        if df.empty:
+            return False
+        self._remember(symbol, df)
+        if not PYARROW_AVAILABLE:
+            return False
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path_for(symbol)
+        tmp_path = f"{path}.tmp"
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pq.ParquetWriter(tmp_path, table.schema, compression="zstd") as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+        return True
+
+    def read(self, symbol: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Read the cached history for a symbol, optionally pruned to columns.
+        Returns None when there is no snapshot, so callers can fall back to Postgres.
+        """
+        recent = self._recall(symbol)
+        if recent is not None:
+            # 返回副本，调用方修改不影响缓存
+            return recent.loc[:, columns].copy() if columns else recent.copy()
+        path = self.path_for(symbol)
+        if not PYARROW_AVAILABLE or not os.path.exists(path):
+            return None
+        return pd.read_parquet(path, columns=columns)
+
+
+def frame_records(df: pd.DataFrame) -> List[dict]:
+    """
+    Convert a cached history frame to row dicts shaped like prices_daily rows:
+    trade_date as date, missing values as None, vol as int.
+    """
+    out = df.astype(object).where(df.notna(), None)
+    if "trade_date" in out:
+        out["trade_date"] = pd.to_datetime(df["trade_date"]).dt.date
+    if "vol" in out:
+        out["vol"] = pd.Series([None if v is None else int(v) for v in out["vol"]], index=out.index, dtype=object)
+    return out.to_dict("records")
+
+
+price_store = PriceStore()
@@ -1,6 +1,10 @@
 
+import importlib.util
+import math
 import os
 from datetime import date
+
+import httpx
 import pandas as pd
 
 USE_LLM = bool(os.getenv("AZURE_OPENAI_KEY", ""))
@@ -13,11 +17,14 @@ def plain_summary(
     preds: list[tuple[date, float, float, float]]
 ) -> str:
     n = name or symbol
-    action = signal_row.get("action", "HOLD") if signal_row is not None else "HOLD"
-    score = float(signal_row.get("signal_score", 0) or 0) if signal_row is not None else 0
-    ma_s = float(signal_row.get("ma_s", 0) or 0) if signal_row is not None else 0
-    ma_l = float(signal_row.get("ma_l", 0) or 0) if signal_row is not None else 0
-    rsi = float(signal_row.get("rsi", 50) or 50) if signal_row is not None else 50
+    if signal_row is not None:
+        action = signal_row.get("action", "HOLD")
+        score, ma_s, ma_l, rsi = (
+            float(signal_row.get(key, default) or default)
+            for key, default in (("signal_score", 0), ("ma_s", 0), ("ma_l", 0), ("rsi", 50))
+        )
+    else:
+        action, score, ma_s, ma_l, rsi = "HOLD", 0, 0, 0, 50
     close = float(today_row["close"])
     pct = float(today_row.get("pct_chg", 0) or 0)
 
@@ -32,12 +39,28 @@ def plain_summary(
         )
     return "\n".join(bullets)
 
+# Azure OpenAI 调用共用一个连接池，避免每次摘要重新握手 TLS
+_llm_client: httpx.AsyncClient | None = None
+
+def get_llm_client() -> httpx.AsyncClient:
+    global _llm_client
+    if _llm_client is None or _llm_client.is_closed:
+        _llm_client = httpx.AsyncClient(
+            timeout=int(os.getenv("AZURE_OPENAI_TIMEOUT", "30")),
+            http2=importlib.util.find_spec("h2") is not None,
+        )
+    return _llm_client
+
+async def close_llm_client():
+    global _llm_client
+    if _llm_client is not None:
+        await _llm_client.aclose()
+        _llm_client = None
+
 async def llm_summarize(text: str) -> str:
     if not USE_LLM:
         return text
     try:
-        import json
-        import requests
         endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
         deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT")
         api_key = os.getenv("AZURE_OPENAI_KEY")
@@ -57,18 +80,26 @@ async def llm_summarize(text: str) -> str:
             "temperature": 0.3,
         }
         url = f"{endpoint}/openai/deployments/{deployment}/chat/completions?api-version={api_version}"
-        r = requests.post(
-            url,
-            headers=headers,
-            data=json.dumps(payload),
-            timeout=int(os.getenv("AZURE_OPENAI_TIMEOUT", "30")),
-        )
+        r = await get_llm_client().post(url, headers=headers, json=payload)
         r.raise_for_status()
         return r.json()["choices"][0]["message"]["content"].strip()
     except Exception:
         return text
 
 
+def _latest_row(df: pd.DataFrame) -> pd.Series:
+    """trade_date 最大的一行；单次扫描，无需整表排序"""
+    return df.iloc[df["trade_date"].to_numpy().argmax()]
+
+def _floats_or_none(row: pd.Series, keys: tuple[str, ...]) -> dict[str, float | None]:
+    """一次向量化转换多个字段；缺失列、空值与非数值均为 None"""
+    values = pd.to_numeric(row.reindex(list(keys)), errors="coerce").to_numpy(dtype="float64")
+    return {key: None if math.isnan(value) else float(value) for key, value in zip(keys, values)}
+
+def _isoformat(value) -> str:
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
 def generate_report_data(symbol: str, price_data=None, signal_data=None, forecast_data=None):
     """
     生成报告数据
@@ -97,15 +128,16 @@ def generate_report_data(symbol: str, price_data=None, signal_data=None, forecas
         # 处理价格数据
         if price_data is not None:
             if isinstance(price_data, pd.DataFrame) and not price_data.empty:
-                latest_data = price_data.sort_values("trade_date").iloc[-1]
+                latest_data = _latest_row(price_data)
+                values = _floats_or_none(latest_data, ("open", "high", "low", "vol", "pct_chg"))
                 report["latest_price_data"] = {
                     "close": float(latest_data["close"]),
-                    "open": float(latest_data["open"]) if "open" in latest_data else None,
-                    "high": float(latest_data["high"]) if "high" in latest_data else None,
-                    "low": float(latest_data["low"]) if "low" in latest_data else None,
-                    "volume": int(latest_data["vol"]) if "vol" in latest_data and pd.notna(latest_data["vol"]) else None,
-                    "pct_change": float(latest_data["pct_chg"]) if "pct_chg" in latest_data and pd.notna(latest_data["pct_chg"]) else None,
-                    "trade_date": latest_data["trade_date"].isoformat() if hasattr(latest_data["trade_date"], 'isoformat') else str(latest_data["trade_date"])
+                    "open": values["open"],
+                    "high": values["high"],
+                    "low": values["low"],
+                    "volume": int(values["vol"]) if values["vol"] is not None else None,
+                    "pct_change": values["pct_chg"],
+                    "trade_date": _isoformat(latest_data["trade_date"])
                 }
                 
                 # 计算数据质量分数
@@ -122,15 +154,13 @@ def generate_report_data(symbol: str, price_data=None, signal_data=None, forecas
         # 处理信号数据
         if signal_data is not None:
             if isinstance(signal_data, pd.DataFrame) and not signal_data.empty:
-                latest_signal = signal_data.sort_values("trade_date").iloc[-1]
+                latest_signal = _latest_row(signal_data)
+                values = _floats_or_none(latest_signal, ("signal_score", "ma_short", "ma_long", "rsi", "macd"))
                 report["signal_data"] = {
                     "action": latest_signal.get("action", "HOLD"),
-                    "signal_score": float(latest_signal["signal_score"]) if "signal_score" in latest_signal and pd.notna(latest_signal["signal_score"]) else 0.0,
-                    "ma_short": float(latest_signal["ma_short"]) if "ma_short" in latest_signal and pd.notna(latest_signal["ma_short"]) else None,
-                    "ma_long": float(latest_signal["ma_long"]) if "ma_long" in latest_signal and pd.notna(latest_signal["ma_long"]) else None,
-                    "rsi": float(latest_signal["rsi"]) if "rsi" in latest_signal and pd.notna(latest_signal["rsi"]) else None,
-                    "macd": float(latest_signal["macd"]) if "macd" in latest_signal and pd.notna(latest_signal["macd"]) else None,
-                    "trade_date": latest_signal["trade_date"].isoformat() if hasattr(latest_signal["trade_date"], 'isoformat') else str(latest_signal["trade_date"])
+                    **values,
+                    "signal_score": values["signal_score"] if values["signal_score"] is not None else 0.0,
+                    "trade_date": _isoformat(latest_signal["trade_date"])
                 }
         
         # 处理预测数据
@@ -1,13 +1,21 @@
 
+import asyncio
+import atexit
+import logging
+import multiprocessing
 import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ProcessPoolExecutor
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from sqlalchemy import select, insert
+from sqlalchemy import select, insert, func
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import datetime, timedelta
 import pandas as pd
 
-from .db import SessionLocal, engine
+from .db import SessionLocal, engine, bulk_insert_ignore
 from .models import Watchlist, PriceDaily, Signal, Forecast, Task, TaskType, TaskStatus
 from .data_source import fetch_daily
 from .signals import compute_signals
@@ -15,90 +23,212 @@ from .forecast import predict_stock_price
 from .report import plain_summary, llm_summarize
 from .news_service import NewsScheduler
 from .news_strategy import NewsStrategyScheduler
+from .price_store import price_store
 
 TZ = os.getenv("TZ", "Asia/Taipei")
 AHEAD = int(os.getenv("FORECAST_AHEAD_DAYS", "5"))
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", str(os.cpu_count() or 1)))
+PIPELINE_CONCURRENCY = int(os.getenv("PIPELINE_CONCURRENCY", "8"))
+# 计算最新信号所用的交易日窗口
+SIGNAL_WINDOW = 250
+
+# 预测模型计算密集，放到独立进程执行，避免阻塞事件循环。
+# 使用 spawn 启动子进程：父进程是多线程的 uvicorn 进程，fork 会继承
+# 其他线程持有的锁和已打开的数据库连接
+_process_pool: ProcessPoolExecutor | None = None
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=FORECAST_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+# 每只股票的摘要输出经队列交给监听线程写 stdout，协程只做入队
+_pipeline_logger: logging.Logger | None = None
+_log_listener: QueueListener | None = None
+
+def get_pipeline_logger() -> logging.Logger:
+    global _pipeline_logger, _log_listener
+    if _pipeline_logger is None:
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _log_listener = QueueListener(log_queue, handler)
+        _log_listener.start()
+        atexit.register(_log_listener.stop)
+        logger = logging.getLogger("aistock.pipeline")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(QueueHandler(log_queue))
+        _pipeline_logger = logger
+    return _pipeline_logger
+
+def shutdown_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+def _load_watchlist() -> list:
+    with SessionLocal() as session:
+        return session.execute(
+            select(Watchlist.symbol, Watchlist.name).where(Watchlist.enabled == True)
+        ).all()
+
+def _store_prices(symbol: str, df: pd.DataFrame) -> pd.DataFrame:
+    """行情入库并读回完整历史；阻塞操作，在线程中执行"""
+    price_cols = ["symbol", "trade_date", "open", "high", "low", "close", "pct_chg", "vol", "amount"]
+    price_df = df.reindex(columns=price_cols).astype(object)
+    rows = price_df.where(price_df.notna(), None).to_dict("records")
+    with SessionLocal() as session:
+        inserted = bulk_insert_ignore(session, PriceDaily, rows, ["symbol", "trade_date"], returning="trade_date")
+        session.commit()
+        # 本次抓取的行全部新写入、且库中没有其他日期时，库内数据即抓取结果，免去整段历史回查；
+        # 已有行冲突被忽略时库内值可能与抓取值不同，信号与预测须以库内数据为准
+        fetched_days = df["trade_date"].nunique()
+        all_inserted = len(inserted) == fetched_days
+        if all_inserted:
+            db_min, db_count = session.execute(
+                select(func.min(PriceDaily.trade_date), func.count())
+                .where(PriceDaily.symbol == symbol)
+            ).one()
+
+    if all_inserted and db_count == fetched_days and db_min is not None and db_min >= df["trade_date"].min():
+        qdf = (
+            df.drop_duplicates("trade_date")
+            .sort_values("trade_date")
+            .reindex(columns=price_cols[1:])
+            .reset_index(drop=True)
+        )
+        qdf["trade_date"] = qdf["trade_date"].to_numpy().astype("datetime64[D]")
+        qdf["vol"] = qdf["vol"].astype("float64")
+    else:
+        qdf = _read_price_history(symbol)
+
+    # 入库后刷新 Parquet 列式缓存，供分析读取
+    try:
+        price_store.write(symbol, qdf)
+    except Exception as e:
+        print(f"Failed to write price cache for {symbol}: {e}")
+    return qdf
+
+def _read_price_history(symbol: str) -> pd.DataFrame:
+    # Core SELECT 复用编译缓存；历史只有数年日线，一次取回即可
+    stmt = (
+        select(
+            PriceDaily.trade_day, PriceDaily.open, PriceDaily.high, PriceDaily.low,
+            PriceDaily.close, PriceDaily.pct_chg, PriceDaily.vol, PriceDaily.amount,
+        )
+        .where(PriceDaily.symbol == symbol)
+        .order_by(PriceDaily.trade_date)
+    )
+    with engine.connect() as conn:
+        result = conn.execute(stmt)
+        # 直接由行元组构造，跳过 pandas 的 SQL 封装层
+        qdf = pd.DataFrame.from_records(result.fetchall(), columns=list(result.keys()))
+    # 整数天数整列转换为 datetime64，避免逐行构造 date 对象
+    qdf.insert(0, "trade_date", qdf.pop("trade_day").to_numpy().astype("datetime64[D]"))
+    return qdf
+
+def _store_signal(symbol: str, last_sig: pd.Series):
+    stmt_sig = pg_insert(Signal).values(
+        symbol=symbol,
+        trade_date=last_sig["trade_date"].date(),
+        ma_short=last_sig["ma_s"],
+        ma_long=last_sig["ma_l"],
+        rsi=last_sig["rsi"],
+        macd=last_sig["macd"],
+        signal_score=last_sig["signal_score"],
+        action=last_sig["action"],
+    ).on_conflict_do_nothing(index_elements=["symbol", "trade_date"])
+    with SessionLocal() as session:
+        session.execute(stmt_sig)
+        session.commit()
+
+def _store_forecasts(forecast_rows: list[dict]):
+    with SessionLocal() as session:
+        # 单条 executemany，驱动层合并为多行 VALUES
+        session.execute(insert(Forecast), forecast_rows)
+        session.commit()
+
+def _forecast_view(forecast_rows: list[dict]) -> list[tuple]:
+    """按目标日期取均值的预测摘要，与写入的预测行一致，无需回查数据库"""
+    if not forecast_rows:
+        return []
+    if len({row["target_date"] for row in forecast_rows}) == len(forecast_rows):
+        # 每个目标日期只有一行（单模型）时均值即原值，无需分组
+        return sorted(
+            (row["target_date"], row["yhat"], row["yhat_lower"], row["yhat_upper"])
+            for row in forecast_rows
+        )
+    fc = pd.DataFrame(forecast_rows)
+    agg = fc.groupby("target_date", sort=True)[["yhat", "yhat_lower", "yhat_upper"]].mean()
+    return list(agg.itertuples(name=None))
+
+async def _process_symbol(symbol: str, name: str, now: datetime):
+    loop = asyncio.get_running_loop()
+    start = (now - timedelta(days=365 * 3)).strftime("%Y%m%d")
+    df = await asyncio.to_thread(fetch_daily, symbol, start_date=start)
+    if df.empty:
+        return
+
+    qdf = await asyncio.to_thread(_store_prices, symbol, df)
+    if len(qdf) < 50:
+        return
+    # 只需最新一行信号；EMA 在 250 个交易日后初值影响约 1e-8，截取尾部即可
+    sig_df = compute_signals(qdf.tail(SIGNAL_WINDOW))
+    last_sig = sig_df.iloc[-1]
+    await asyncio.to_thread(_store_signal, symbol, last_sig)
+
+    # 使用增强预测模型
+    prediction_result = await loop.run_in_executor(
+        get_process_pool(), predict_stock_price, qdf, symbol, AHEAD
+    )
+
+    run_at = now
+    forecast_rows = []
+    if prediction_result.get("predictions"):
+        model_name = prediction_result.get("method", "enhanced").upper()
+        last_date = qdf["trade_date"].iloc[-1]
+        forecast_rows = [
+            {
+                "symbol": symbol,
+                "run_at": run_at,
+                "target_date": (last_date + timedelta(days=pred["day"])).date(),
+                "model": model_name,
+                "yhat": float(pred["predicted_price"]),
+                "yhat_lower": float(pred["lower_bound"]),
+                "yhat_upper": float(pred["upper_bound"]),
+            }
+            for pred in prediction_result["predictions"]
+        ]
+    if forecast_rows:
+        await asyncio.to_thread(_store_forecasts, forecast_rows)
+
+    preds_view = _forecast_view(forecast_rows)
+    today_row = qdf.iloc[-1]
+    summary = plain_summary(symbol, name, today_row, last_sig, preds_view)
+    pretty = await llm_summarize(summary)
+    get_pipeline_logger().info(pretty)
 
 async def run_daily_pipeline() -> bool:
     now = datetime.now()
-    with SessionLocal() as session:
-        watches = session.execute(select(Watchlist).where(Watchlist.enabled == True)).scalars().all()
-        for w in watches:
-            start = (now - timedelta(days=365 * 3)).strftime("%Y%m%d")
-            df = fetch_daily(w.symbol, start_date=start)
-            if df.empty:
-                continue
-            for _, row in df.iterrows():
-                stmt = pg_insert(PriceDaily).values(
-                    symbol=row["symbol"],
-                    trade_date=row["trade_date"],
-                    open=row["open"],
-                    high=row["high"],
-                    low=row["low"],
-                    close=row["close"],
-                    pct_chg=row.get("pct_chg"),
-                    vol=(int(row["vol"]) if pd.notna(row["vol"]) else None),
-                    amount=row.get("amount"),
-                ).on_conflict_do_nothing(index_elements=["symbol", "trade_date"])
-                session.execute(stmt)
-            session.commit()
-
-            qdf = pd.read_sql_query(
-                "SELECT trade_date, open, high, low, close, pct_chg, vol, amount FROM prices_daily WHERE symbol = %s ORDER BY trade_date",
-                con=engine,
-                params=(w.symbol,),
-            )
-            if len(qdf) < 50:
-                continue
-            sig_df = compute_signals(qdf)
-            last_sig = sig_df.iloc[-1]
-            stmt_sig = pg_insert(Signal).values(
-                symbol=w.symbol,
-                trade_date=last_sig["trade_date"],
-                ma_short=last_sig["ma_s"],
-                ma_long=last_sig["ma_l"],
-                rsi=last_sig["rsi"],
-                macd=last_sig["macd"],
-                signal_score=last_sig["signal_score"],
-                action=last_sig["action"],
-            ).on_conflict_do_nothing(index_elements=["symbol", "trade_date"])
-            session.execute(stmt_sig)
-
-            # 使用增强预测模型
-            prediction_result = predict_stock_price(qdf, w.symbol, ahead_days=AHEAD)
-            
-            if prediction_result.get("predictions"):
-                run_at = now
-                model_name = prediction_result.get("method", "enhanced").upper()
-                
-                for pred in prediction_result["predictions"]:
-                    day = pred["day"]
-                    target_date = qdf["trade_date"].iloc[-1] + timedelta(days=day)
-                    stmt_fc = insert(Forecast).values(
-                        symbol=w.symbol,
-                        run_at=run_at,
-                        target_date=target_date,
-                        model=model_name,
-                        yhat=float(pred["predicted_price"]),
-                        yhat_lower=float(pred["lower_bound"]),
-                        yhat_upper=float(pred["upper_bound"]),
-                    )
-                    session.execute(stmt_fc)
-            session.commit()
-
-            fdf = pd.read_sql_query(
-                "SELECT target_date, avg(yhat) yhat, avg(yhat_lower) yl, avg(yhat_upper) yu FROM forecasts WHERE symbol=%s AND run_at=%s GROUP BY target_date ORDER BY target_date",
-                con=engine,
-                params=(w.symbol, run_at),
-            )
-            preds_view: list[tuple] = []
-            if not fdf.empty:
-                for _, row in fdf.iterrows():
-                    preds_view.append((row["target_date"], row["yhat"], row["yl"], row["yu"]))
-            today_row = qdf.iloc[-1]
-            summary = plain_summary(w.symbol, w.name, today_row, last_sig, preds_view)
-            pretty = await llm_summarize(summary)
-            print(pretty)
+    watches = await asyncio.to_thread(_load_watchlist)
+
+    # 各股票相互独立，并发处理；信号量限制同时进行的行情抓取与数据库写入
+    sem = asyncio.Semaphore(PIPELINE_CONCURRENCY)
+
+    async def guarded(symbol: str, name: str):
+        async with sem:
+            try:
+                await _process_symbol(symbol, name, now)
+            except Exception as e:
+                print(f"Daily pipeline failed for {symbol}: {e}")
+
+    await asyncio.gather(*(guarded(symbol, name) for symbol, name in watches))
             
     # Run intelligent news collection
     await run_intelligent_news_collection()
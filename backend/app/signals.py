@@ -1,44 +1,93 @@
 
 import numpy as np
 import pandas as pd
+from scipy.signal import lfilter
 
-def rsi(series: pd.Series, period: int = 14) -> pd.Series:
-    delta = series.diff()
+# bottleneck imports (optional)
+try:
+    import bottleneck as bn
+    BOTTLENECK_AVAILABLE = True
+except ImportError:
+    BOTTLENECK_AVAILABLE = False
+    bn = None
+
+def _move_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """滚动均值，窗口未满时为 NaN（同 rolling(window).mean()）"""
+    out = np.full(len(values), np.nan)
+    if len(values) < window:
+        # bottleneck 要求窗口不超过数组长度
+        return out
+    if BOTTLENECK_AVAILABLE:
+        return bn.move_mean(values, window, min_count=window)
+    if np.isnan(values).any():
+        # 缺失值只影响所在窗口，逐窗口求均值
+        out[window - 1:] = np.lib.stride_tricks.sliding_window_view(values, window).mean(axis=1)
+    else:
+        # 前缀和作差，O(n)
+        csum = np.concatenate(([0.0], np.cumsum(values)))
+        out[window - 1:] = (csum[window:] - csum[:-window]) / window
+    return out
+
+def _shift(values: np.ndarray) -> np.ndarray:
+    prev = np.empty_like(values)
+    prev[0:1] = np.nan
+    prev[1:] = values[:-1]
+    return prev
+
+def _ewma(values: np.ndarray, alpha: float) -> np.ndarray:
+    """递推 EWMA（同 ewm(alpha=alpha, adjust=False).mean()），以 IIR 滤波在 C 循环中一次完成"""
+    if len(values) == 0:
+        return values.copy()
+    if np.isnan(values).any():
+        # 含缺失值时按 pandas 语义跳过 NaN，滤波器会把 NaN 一直向后传播
+        return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    out, _ = lfilter([alpha], [1.0, alpha - 1.0], values, zi=[(1.0 - alpha) * values[0]])
+    return out
+
+def rsi(series, period: int = 14) -> np.ndarray:
+    close = np.asarray(series, dtype=np.float64)
+    delta = np.diff(close, prepend=np.nan)
     up = np.where(delta > 0, delta, 0.0)
     down = np.where(delta < 0, -delta, 0.0)
-    roll_up = pd.Series(up, index=series.index).ewm(alpha=1/period, adjust=False).mean()
-    roll_down = pd.Series(down, index=series.index).ewm(alpha=1/period, adjust=False).mean()
+    # Wilder 平滑
+    roll_up = _ewma(up, 1/period)
+    roll_down = _ewma(down, 1/period)
     rs = roll_up / (roll_down + 1e-9)
     return 100.0 - (100.0 / (1.0 + rs))
 
-def macd(series: pd.Series, fast=12, slow=26, signal=9):
-    e1 = series.ewm(span=fast, adjust=False).mean()
-    e2 = series.ewm(span=slow, adjust=False).mean()
-    macd_line = e1 - e2
-    signal_line = macd_line.ewm(span=signal, adjust=False).mean()
+def macd(series, fast=12, slow=26, signal=9):
+    close = np.asarray(series, dtype=np.float64)
+    # span 对应 alpha = 2 / (span + 1)
+    macd_line = _ewma(close, 2 / (fast + 1)) - _ewma(close, 2 / (slow + 1))
+    signal_line = _ewma(macd_line, 2 / (signal + 1))
     hist = macd_line - signal_line
     return macd_line, signal_line, hist
 
 def compute_signals(df: pd.DataFrame, short=10, long=30) -> pd.DataFrame:
     df = df.sort_values("trade_date").copy()
-    df["ma_s"] = df["close"].rolling(short).mean()
-    df["ma_l"] = df["close"].rolling(long).mean()
-    df["rsi"] = rsi(df["close"], 14)
-    macd_line, signal_line, hist = macd(df["close"])
-    df["macd"] = macd_line
-    df["macd_sig"] = signal_line
-    df["macd_hist"] = hist
-
-    score = np.zeros(len(df))
-    cross_up = (df["ma_s"] > df["ma_l"]) & (df["ma_s"].shift(1) <= df["ma_l"].shift(1))
-    cross_dn = (df["ma_s"] < df["ma_l"]) & (df["ma_s"].shift(1) >= df["ma_l"].shift(1))
-    score = score + np.where(cross_up, 20, 0) - np.where(cross_dn, 20, 0)
-    score += np.clip(50 - (df["rsi"] - 50).abs(), -15, 15)
-    score += np.where((df["macd"] > df["macd_sig"]) & (df["macd"].shift(1) <= df["macd_sig"].shift(1)), 10, 0)
-
-    df["signal_score"] = score
-    df["action"] = np.where(
-        df["signal_score"] >= 15, "BUY",
-        np.where(df["signal_score"] <= -15, "TRIM", "HOLD")
+    close = df["close"].to_numpy(dtype=np.float64)
+    ma_s = _move_mean(close, short)
+    ma_l = _move_mean(close, long)
+    rsi_v = rsi(close, 14)
+    macd_line, signal_line, hist = macd(close)
+
+    # NaN 比较结果为 False，与 pandas 行为一致
+    with np.errstate(invalid="ignore"):
+        ma_s_prev, ma_l_prev = _shift(ma_s), _shift(ma_l)
+        cross_up = (ma_s > ma_l) & (ma_s_prev <= ma_l_prev)
+        cross_dn = (ma_s < ma_l) & (ma_s_prev >= ma_l_prev)
+        macd_up = (macd_line > signal_line) & (_shift(macd_line) <= _shift(signal_line))
+
+    # 以 RSI 项为底，在同一数组上原地累加各项
+    score = np.abs(rsi_v - 50)
+    np.subtract(50, score, out=score)
+    np.clip(score, -15, 15, out=score)
+    score[cross_up] += 20.0
+    score[cross_dn] -= 20.0
+    score[macd_up] += 10.0
+
+    df[["ma_s", "ma_l", "rsi", "macd", "macd_sig", "macd_hist", "signal_score"]] = np.column_stack(
+        [ma_s, ma_l, rsi_v, macd_line, signal_line, hist, score]
     )
+    df["action"] = np.select([score >= 15, score <= -15], ["BUY", "TRIM"], default="HOLD")
     return df
@@ -5,30 +5,78 @@ import asyncio
 import json
 import logging
 from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
 from typing import Optional, List, Dict, Any
-from sqlalchemy import select, and_, text, update
+from sqlalchemy import select, and_, text, update, lambda_stmt
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from .db import SessionLocal
+from .price_store import price_store, frame_records
 from .models import Task, Report, Watchlist, PriceDaily, Signal, Forecast, TaskStatus, TaskType
 
 logger = logging.getLogger(__name__)
 
+# 报告所需的最新行情字段
+_LATEST_PRICE_COLUMNS = ["trade_date", "open", "high", "low", "close", "pct_chg", "vol"]
+
+# 高频执行的轮询/认领语句使用 lambda_stmt，编译结果缓存后每次只绑定参数
+def _pending_tasks_stmt():
+    return lambda_stmt(
+        lambda: select(Task.id, Task.priority)
+        .where(Task.status == TaskStatus.PENDING)
+        .order_by(Task.priority.asc(), Task.created_at.asc())
+    )
+
+def _claim_task_stmt(task_id: int, started_at: datetime):
+    return lambda_stmt(
+        lambda: update(Task)
+        .where(Task.id == task_id, Task.status == TaskStatus.PENDING)
+        .values(status=TaskStatus.RUNNING, started_at=started_at)
+        .returning(Task.id)
+    )
+
 class TaskManager:
     def __init__(self):
         self.running_tasks = set()
         self.max_concurrent_tasks = 3
         self._stopped = False
+        # 进程内任务队列 (priority, task_id)，数据库作为持久化兜底
+        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._queued_ids = set()
+        self._slots = asyncio.Semaphore(self.max_concurrent_tasks)
+        self._workers: List[asyncio.Task] = []
+        # 扫描数据库中由其他进程写入的待处理任务的间隔（秒）
+        self.reconcile_interval = 60
+        
+    def start(self):
+        """启动后台任务处理协程（需在事件循环中调用）"""
+        self._stopped = False
+        self._workers = [
+            asyncio.create_task(self.process_tasks()),
+            asyncio.create_task(self._reconcile_pending_tasks()),
+        ]
         
     def stop(self):
         """停止任务管理器"""
         self._stopped = True
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
         
     def is_stopped(self) -> bool:
         """检查任务管理器是否已停止"""
         return self._stopped
+    
+    async def enqueue(self, task_id: int, priority: int = 5):
+        """将任务放入进程内队列，已在队列或运行中的任务会被忽略"""
+        if task_id in self._queued_ids or task_id in self.running_tasks:
+            return
+        self._queued_ids.add(task_id)
+        await self.queue.put((priority, task_id))
         
-    def create_task(self, task_type: str, symbol: str, priority: int = 5, metadata: Optional[Dict[str, Any]] = None) -> Optional[int]:
+    async def create_task(self, task_type: str, symbol: str, priority: int = 5, metadata: Optional[Dict[str, Any]] = None) -> Optional[int]:
         """创建新任务
         
         Args:
@@ -67,11 +115,14 @@ class TaskManager:
                 )
                 
                 session.add(task)
+                # flush 时 INSERT ... RETURNING 已带回 id，提交前取出，免去 refresh 回查
+                session.flush()
+                task_id = task.id
                 session.commit()
-                session.refresh(task)
                 
-                logger.info(f"Created task {task.id} for {symbol} with type {task_type}")
-                return task.id
+                logger.info(f"Created task {task_id} for {symbol} with type {task_type}")
+                await self.enqueue(task_id, priority)
+                return task_id
                 
         except Exception as e:
             logger.error(f"Failed to create task for {symbol}: {e}")
@@ -103,46 +154,61 @@ class TaskManager:
                 task_metadata=json.dumps({"auto_created": True})
             )
             session.add(new_task)
+            session.flush()
+            task_id = new_task.id
             session.commit()
-            session.refresh(new_task)
             
-            logger.info(f"Created report task for {symbol}, task_id: {new_task.id}")
-            return new_task.id
+            logger.info(f"Created report task for {symbol}, task_id: {task_id}")
+            await self.enqueue(task_id, priority)
+            return task_id
     
     async def check_and_create_missing_report_tasks(self) -> List[int]:
         """检查所有自选股票，为没有报告且没有任务的股票创建报告任务"""
-        created_tasks = []
-        
         with SessionLocal() as session:
             # 获取所有启用的自选股票
             watchlist_stocks = session.execute(
                 select(Watchlist.symbol).where(Watchlist.enabled == True)
             ).scalars().all()
-            
-            for symbol in watchlist_stocks:
-                # 检查是否有最新报告
-                has_report = session.execute(
-                    select(Report).where(
-                        and_(Report.symbol == symbol, Report.is_latest == True)
-                    )
-                ).scalar_one_or_none()
-                
-                if not has_report:
-                    # 检查是否有待处理的任务
-                    has_pending_task = session.execute(
-                        select(Task).where(
-                            and_(
-                                Task.symbol == symbol,
-                                Task.task_type == TaskType.GENERATE_REPORT,
-                                Task.status.in_([TaskStatus.PENDING, TaskStatus.RUNNING])
-                            )
-                        )
-                    ).scalar_one_or_none()
-                    
-                    if not has_pending_task:
-                        task_id = await self.create_report_task(symbol, priority=3)
-                        if task_id:
-                            created_tasks.append(task_id)
+            if not watchlist_stocks:
+                return []
+
+            # 两次集合查询取代逐股票检查：已有最新报告的、已有待处理任务的
+            has_report = set(session.execute(
+                select(Report.symbol).where(
+                    Report.symbol.in_(watchlist_stocks), Report.is_latest == True
+                )
+            ).scalars())
+            has_pending_task = set(session.execute(
+                select(Task.symbol).where(
+                    Task.symbol.in_(watchlist_stocks),
+                    Task.task_type == TaskType.GENERATE_REPORT,
+                    Task.status.in_([TaskStatus.PENDING, TaskStatus.RUNNING])
+                )
+            ).scalars())
+
+            missing = [
+                symbol for symbol in dict.fromkeys(watchlist_stocks)
+                if symbol not in has_report and symbol not in has_pending_task
+            ]
+            created_tasks = []
+            if missing:
+                metadata = json.dumps({"auto_created": True})
+                created_tasks = session.execute(
+                    pg_insert(Task).values([
+                        {
+                            "task_type": TaskType.GENERATE_REPORT,
+                            "symbol": symbol,
+                            "status": TaskStatus.PENDING,
+                            "priority": 3,
+                            "task_metadata": metadata,
+                        }
+                        for symbol in missing
+                    ]).returning(Task.id)
+                ).scalars().all()
+                session.commit()
+
+        for task_id in created_tasks:
+            await self.enqueue(task_id, 3)
         
         logger.info(f"Created {len(created_tasks)} missing report tasks")
         return created_tasks
@@ -151,18 +217,16 @@ class TaskManager:
         """执行报告生成任务"""
         with SessionLocal() as session:
             # 获取任务
-            task = session.execute(
-                select(Task).where(Task.id == task_id)
-            ).scalar_one_or_none()
+            task = session.get(Task, task_id)
             
             if not task or task.status != TaskStatus.PENDING:
                 logger.warning(f"Task {task_id} not found or not pending")
                 return False
             
             # 更新任务状态为运行中
-            task.status = TaskStatus.RUNNING
-            task.started_at = datetime.utcnow()
-            session.commit()
+            if not self._claim_task(session, task_id):
+                logger.warning(f"Task {task_id} was claimed by another worker")
+                return False
             
             try:
                 # 生成报告
@@ -192,14 +256,15 @@ class TaskManager:
     async def _generate_report(self, symbol: str, session) -> bool:
         """生成股票报告"""
         try:
-            # 获取最新价格数据
-            latest_price = session.execute(
-                select(PriceDaily).where(PriceDaily.symbol == symbol)
-                .order_by(PriceDaily.trade_date.desc())
-                .limit(1)
-            ).scalar_one_or_none()
+            # 最新价格优先取流水线刚写入的行情缓存，缺失时读基础表
+            latest_price = self._latest_price_from_store(symbol)
+            if latest_price is None:
+                latest_price = session.execute(
+                    select(PriceDaily).where(PriceDaily.symbol == symbol)
+                    .order_by(PriceDaily.trade_date.desc())
+                    .limit(1)
+                ).scalar_one_or_none()
             
-            # 获取最新信号数据
             latest_signal = session.execute(
                 select(Signal).where(Signal.symbol == symbol)
                 .order_by(Signal.trade_date.desc())
@@ -247,11 +312,17 @@ class TaskManager:
                     "model": f.model
                 })
             
+            # 预测值一次取为数组（None 记为 NaN），供评分与置信度计算
+            yhat, yhat_lower, yhat_upper = (
+                np.array([f[key] for f in forecast_data], dtype=float)
+                for key in ("yhat", "yhat_lower", "yhat_upper")
+            )
+            
             # 计算数据质量评分
-            data_quality_score = self._calculate_data_quality(latest_price, latest_signal, forecasts)
+            data_quality_score = self._calculate_data_quality(latest_price, latest_signal, yhat)
             
             # 计算预测置信度
-            prediction_confidence = self._calculate_prediction_confidence(forecasts)
+            prediction_confidence = self._calculate_prediction_confidence(yhat, yhat_lower, yhat_upper)
             
             # 生成分析摘要
             analysis_summary = self._generate_analysis_summary(symbol, latest_price, latest_signal, forecasts)
@@ -265,23 +336,22 @@ class TaskManager:
             
             next_version = (max_version or 0) + 1
             
-            # 将之前的报告标记为非最新 - 使用事务确保一致性
+            # 取消旧报告的最新标记并写入新报告，同一事务提交；
+            # uq_report_symbol_latest 部分唯一索引保证每个股票只有一份最新报告
             session.execute(
                 update(Report)
                 .where(and_(Report.symbol == symbol, Report.is_latest == True))
                 .values(is_latest=False)
             )
             
-            # 立即提交更新，确保数据一致性
-            session.commit()
-            
             # 创建新报告
             new_report = Report(
                 symbol=symbol,
                 version=next_version,
-                latest_price_data=json.dumps(price_data) if price_data else None,
-                signal_data=json.dumps(signal_data) if signal_data else None,
-                forecast_data=json.dumps(forecast_data) if forecast_data else None,
+                # JSONB 列，直接写入 dict/list
+                latest_price_data=price_data or None,
+                signal_data=signal_data or None,
+                forecast_data=forecast_data or None,
                 analysis_summary=analysis_summary,
                 data_quality_score=data_quality_score,
                 prediction_confidence=prediction_confidence,
@@ -298,7 +368,18 @@ class TaskManager:
             logger.error(f"Error generating report for {symbol}: {e}")
             return False
     
-    def _calculate_data_quality(self, price_data, signal_data, forecasts) -> float:
+    def _latest_price_from_store(self, symbol: str) -> Optional[SimpleNamespace]:
+        """行情缓存中的最新一行，字段与 PriceDaily 一致；无缓存时返回 None"""
+        try:
+            cached = price_store.read(symbol, columns=_LATEST_PRICE_COLUMNS)
+        except Exception as e:
+            logger.warning(f"Failed to read price cache for {symbol}: {e}")
+            return None
+        if cached is None or cached.empty:
+            return None
+        return SimpleNamespace(**frame_records(cached.tail(1))[0])
+    
+    def _calculate_data_quality(self, price_data, signal_data, yhat: np.ndarray) -> float:
         """计算数据质量评分 (0-10)"""
         score = 0.0
         
@@ -315,34 +396,26 @@ class TaskManager:
             score += (signal_count / 4) * 4.0
         
         # 预测数据质量 (20%)
-        if forecasts:
-            valid_forecasts = sum(1 for f in forecasts if f.yhat is not None)
-            if valid_forecasts > 0:
-                score += min(2.0, valid_forecasts / 5 * 2.0)
+        valid_forecasts = int(np.count_nonzero(~np.isnan(yhat)))
+        if valid_forecasts > 0:
+            score += min(2.0, valid_forecasts / 5 * 2.0)
         
         return round(score, 2)
     
-    def _calculate_prediction_confidence(self, forecasts) -> float:
+    def _calculate_prediction_confidence(self, yhat: np.ndarray, yhat_lower: np.ndarray, yhat_upper: np.ndarray) -> float:
         """计算预测置信度 (0-1)"""
-        if not forecasts:
+        # 基于预测区间的宽度来评估置信度；三项均非空且非零的预测才参与计算
+        valid = np.ones(len(yhat), dtype=bool)
+        for values in (yhat, yhat_lower, yhat_upper):
+            valid &= ~np.isnan(values) & (values != 0)
+        if not valid.any():
             return 0.0
         
-        # 基于预测区间的宽度来评估置信度
-        valid_intervals = []
-        for f in forecasts:
-            if f.yhat and f.yhat_lower and f.yhat_upper:
-                yhat = float(f.yhat)
-                yhat_lower = float(f.yhat_lower)
-                yhat_upper = float(f.yhat_upper)
-                interval_width = abs(yhat_upper - yhat_lower)
-                relative_width = interval_width / max(abs(yhat), 1)  # 避免除零
-                valid_intervals.append(relative_width)
-        
-        if not valid_intervals:
-            return 0.0
+        interval_width = np.abs(yhat_upper[valid] - yhat_lower[valid])
+        relative_width = interval_width / np.maximum(np.abs(yhat[valid]), 1)  # 避免除零
         
         # 区间越窄，置信度越高
-        avg_relative_width = sum(valid_intervals) / len(valid_intervals)
+        avg_relative_width = float(relative_width.mean())
         confidence = max(0.0, min(1.0, 1.0 - avg_relative_width))
         
         return round(confidence, 3)
@@ -362,12 +435,11 @@ class TaskManager:
             if signal_data.signal_score is not None:
                 summary_parts.append(f"信号评分：{float(signal_data.signal_score):.1f}")
         
-        if forecasts:
-            future_forecasts = [f for f in forecasts if f.target_date > datetime.now().date()]
-            if future_forecasts:
-                next_forecast = future_forecasts[0]
-                if next_forecast.yhat:
-                    summary_parts.append(f"短期预测：{float(next_forecast.yhat):.2f}")
+        # 预测按目标日期升序，取第一条未来预测即可
+        today = datetime.now().date()
+        next_forecast = next((f for f in forecasts if f.target_date > today), None)
+        if next_forecast is not None and next_forecast.yhat:
+            summary_parts.append(f"短期预测：{float(next_forecast.yhat):.2f}")
         
         return " | ".join(summary_parts) if summary_parts else f"{symbol} 数据分析报告已生成"
     
@@ -392,23 +464,46 @@ class TaskManager:
             ]
     
     async def process_tasks(self):
-        """处理待处理的任务"""
-        if len(self.running_tasks) >= self.max_concurrent_tasks:
-            return
-        
-        with SessionLocal() as session:
-            # 获取待处理任务
-            tasks = session.execute(
-                select(Task).where(Task.status == TaskStatus.PENDING)
-                .order_by(Task.priority.asc(), Task.created_at.asc())
-                .limit(self.max_concurrent_tasks - len(self.running_tasks))
-            ).scalars().all()
+        """处理队列中的任务，队列为空时阻塞等待，不占用CPU"""
+        while not self._stopped:
+            await self._slots.acquire()
+            try:
+                _, task_id = await self.queue.get()
+            except BaseException:
+                self._slots.release()
+                raise
+            self._queued_ids.discard(task_id)
+            
+            if task_id in self.running_tasks:
+                self._slots.release()
+                continue
+            
+            self.running_tasks.add(task_id)
+            # 异步执行任务
+            asyncio.create_task(self._execute_task_wrapper(task_id))
+    
+    async def _reconcile_pending_tasks(self):
+        """启动时加载数据库中的待处理任务，之后定期扫描其他进程写入的任务"""
+        while not self._stopped:
+            try:
+                with SessionLocal() as session:
+                    pending = session.execute(_pending_tasks_stmt()).all()
+                
+                for task_id, priority in pending:
+                    await self.enqueue(task_id, priority)
+            except Exception as e:
+                logger.error(f"Failed to load pending tasks: {e}")
             
-            for task in tasks:
-                if task.id not in self.running_tasks:
-                    self.running_tasks.add(task.id)
-                    # 异步执行任务
-                    asyncio.create_task(self._execute_task_wrapper(task.id))
+            await asyncio.sleep(self.reconcile_interval)
+    
+    def _claim_task(self, session, task_id: int) -> bool:
+        """将 pending 任务原子地标记为 running，返回是否认领成功"""
+        claimed = session.execute(
+            _claim_task_stmt(task_id, datetime.utcnow()),
+            execution_options={"synchronize_session": False},
+        ).first()
+        session.commit()
+        return claimed is not None
     
     async def _execute_task_wrapper(self, task_id: int):
         """任务执行包装器"""
@@ -416,9 +511,7 @@ class TaskManager:
             if task_id in self.running_tasks:
                 # 获取任务类型并执行相应的处理器
                 with SessionLocal() as session:
-                    task = session.execute(
-                        select(Task).where(Task.id == task_id)
-                    ).scalar_one_or_none()
+                    task = session.get(Task, task_id)
                     
                     if task:
                         if task.task_type == TaskType.GENERATE_REPORT.value:
@@ -429,23 +522,22 @@ class TaskManager:
                             logger.warning(f"Unknown task type: {task.task_type}")
         finally:
             self.running_tasks.discard(task_id)
+            self._slots.release()
     
     async def execute_news_task(self, task_id: int) -> bool:
         """执行新闻收集任务"""
         with SessionLocal() as session:
             # 获取任务
-            task = session.execute(
-                select(Task).where(Task.id == task_id)
-            ).scalar_one_or_none()
+            task = session.get(Task, task_id)
             
             if not task or task.status != TaskStatus.PENDING:
                 logger.warning(f"News task {task_id} not found or not pending")
                 return False
             
             # 更新任务状态为运行中
-            task.status = TaskStatus.RUNNING
-            task.started_at = datetime.utcnow()
-            session.commit()
+            if not self._claim_task(session, task_id):
+                logger.warning(f"News task {task_id} was claimed by another worker")
+                return False
             
             try:
                 # 执行新闻收集
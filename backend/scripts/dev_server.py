@@ -98,11 +98,11 @@ def start_news_test_server(port=8082):
             response_articles = []
             for i, article in enumerate(articles[:5]):  # 限制5篇文章
                 article_data = {
-                    "title": article.title,
-                    "url": article.url,
-                    "summary": article.summary or "",
-                    "sentiment_type": article.sentiment_type,
-                    "relevance_score": article.relevance_score
+                    "title": article["title"],
+                    "url": article["url"],
+                    "summary": article["summary"] or "",
+                    "sentiment_type": article["sentiment_type"],
+                    "relevance_score": article["relevance_score"]
                 }
                 response_articles.append(article_data)
             
@@ -52,11 +52,11 @@ async def test_news_search():
             
             for i, article in enumerate(articles):
                 print(f"\n文章 {i+1}:")
-                print(f"  标题: {article.title}")
-                print(f"  URL: {article.url}")
-                print(f"  摘要: {article.summary}")
-                print(f"  情感类型: {article.sentiment_type}")
-                print(f"  相关性评分: {article.relevance_score}")
+                print(f"  标题: {article['title']}")
+                print(f"  URL: {article['url']}")
+                print(f"  摘要: {article['summary']}")
+                print(f"  情感类型: {article['sentiment_type']}")
+                print(f"  相关性评分: {article['relevance_score']}")
         
         except Exception as e:
             print(f"处理失败: {e}")
@@ -58,6 +58,11 @@ class TestRunner:
         # 定义测试列表
         unit_tests = [
             ("tests/unit/test_stock_info.py", "股票信息单元测试"),
+            ("tests/unit/test_news_dedup.py", "新闻去重单元测试"),
+            ("tests/unit/test_keyword_matcher.py", "关键词匹配单元测试"),
+            ("tests/unit/test_bulk_insert.py", "批量写入单元测试"),
+            ("tests/unit/test_signals.py", "技术信号单元测试"),
+            ("tests/unit/test_price_store.py", "列式行情缓存单元测试"),
         ]
         
         integration_tests = [
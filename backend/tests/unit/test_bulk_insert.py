@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+批量写入 bulk_insert_ignore 的单元测试：多行 VALUES 与 COPY 两条路径
+"""
+import sys
+import os
+import datetime
+import unittest
+from unittest import mock
+
+# Add the backend directory to the path
+backend_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, backend_root)
+
+from sqlalchemy.dialects import postgresql
+
+from app import db
+from app.db import bulk_insert_ignore, _copy_value
+from app.models import PriceDaily, NewsCategory
+
+
+def price_rows(n):
+    return [
+        {"symbol": "600519.SH", "trade_date": datetime.date(2024, 1, 1) + datetime.timedelta(days=i), "close": 1.0 + i}
+        for i in range(n)
+    ]
+
+
+class TestBulkInsertValues(unittest.TestCase):
+    """阈值以下走多行 INSERT ... ON CONFLICT DO NOTHING"""
+
+    def test_empty_rows(self):
+        """没有行时不访问数据库"""
+        session = mock.MagicMock()
+        self.assertIsNone(bulk_insert_ignore(session, PriceDaily, [], ["symbol", "trade_date"]))
+        self.assertEqual(bulk_insert_ignore(session, PriceDaily, [], ["symbol", "trade_date"], returning="id"), [])
+        session.execute.assert_not_called()
+        session.connection.assert_not_called()
+
+    def test_below_threshold(self):
+        """阈值以下执行一条多行 INSERT，不使用 COPY"""
+        session = mock.MagicMock()
+        with mock.patch.object(db, "COPY_THRESHOLD", 3):
+            result = bulk_insert_ignore(session, PriceDaily, price_rows(2), ["symbol", "trade_date"])
+
+        self.assertIsNone(result)
+        session.connection.assert_not_called()
+        stmt = session.execute.call_args.args[0]
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        self.assertIn("INSERT INTO prices_daily", sql)
+        self.assertIn("ON CONFLICT (symbol, trade_date) DO NOTHING", sql)
+        self.assertNotIn("RETURNING", sql)
+
+    def test_below_threshold_returning(self):
+        """指定 returning 时返回新插入行的该列值"""
+        session = mock.MagicMock()
+        session.execute.return_value.scalars.return_value.all.return_value = [7, 8]
+        with mock.patch.object(db, "COPY_THRESHOLD", 3):
+            result = bulk_insert_ignore(session, PriceDaily, price_rows(2), None, returning="trade_date")
+
+        self.assertEqual(result, [7, 8])
+        sql = str(session.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        self.assertIn("ON CONFLICT DO NOTHING", sql)
+        self.assertIn("RETURNING prices_daily.trade_date", sql)
+
+
+class TestBulkInsertCopy(unittest.TestCase):
+    """达到阈值时 COPY 到临时表再合并"""
+
+    def setUp(self):
+        self.session = mock.MagicMock()
+        self.cursor = self.session.connection.return_value.connection.cursor.return_value
+        self.copied = []
+        self.cursor.copy_expert.side_effect = lambda sql, buf: self.copied.append((sql, buf.read()))
+
+    def executed(self):
+        return [call.args[0] for call in self.cursor.execute.call_args_list]
+
+    def test_at_threshold(self):
+        """行数等于阈值即走 COPY，合并语句带冲突目标"""
+        with mock.patch.object(db, "COPY_THRESHOLD", 3):
+            result = bulk_insert_ignore(self.session, PriceDaily, price_rows(3), ["symbol", "trade_date"])
+
+        self.assertIsNone(result)
+        self.session.execute.assert_not_called()
+        statements = self.executed()
+        self.assertEqual(
+            statements[0],
+            "CREATE TEMP TABLE prices_daily_staging (LIKE prices_daily INCLUDING DEFAULTS) ON COMMIT DROP",
+        )
+        self.assertEqual(
+            statements[1],
+            "INSERT INTO prices_daily (symbol, trade_date, close) SELECT symbol, trade_date, close "
+            "FROM prices_daily_staging ON CONFLICT (symbol, trade_date) DO NOTHING",
+        )
+        self.assertEqual(statements[2], "DROP TABLE prices_daily_staging")
+        self.cursor.fetchall.assert_not_called()
+        self.cursor.close.assert_called_once()
+
+        sql, body = self.copied[0]
+        self.assertEqual(sql, "COPY prices_daily_staging (symbol, trade_date, close) FROM STDIN WITH (FORMAT text)")
+        self.assertEqual(
+            body.splitlines(),
+            ["600519.SH\t2024-01-01\t1.0", "600519.SH\t2024-01-02\t2.0", "600519.SH\t2024-01-03\t3.0"],
+        )
+
+    def test_returning_any_conflict(self):
+        """未指定冲突列时忽略任意冲突，并读回 RETURNING 结果"""
+        self.cursor.fetchall.return_value = [(11,), (12,)]
+        with mock.patch.object(db, "COPY_THRESHOLD", 3):
+            result = bulk_insert_ignore(self.session, PriceDaily, price_rows(4), None, returning="id")
+
+        self.assertEqual(result, [11, 12])
+        self.assertTrue(self.executed()[1].endswith("ON CONFLICT DO NOTHING RETURNING id"))
+
+    def test_cursor_closed_on_error(self):
+        """COPY 失败时仍关闭游标"""
+        self.cursor.copy_expert.side_effect = RuntimeError("copy failed")
+        with mock.patch.object(db, "COPY_THRESHOLD", 3):
+            with self.assertRaises(RuntimeError):
+                bulk_insert_ignore(self.session, PriceDaily, price_rows(3), ["symbol", "trade_date"])
+        self.cursor.close.assert_called_once()
+
+
+class TestCopyValue(unittest.TestCase):
+    """COPY text 格式字段转换测试类"""
+
+    def test_null_values(self):
+        """None 与 NaN 写为 \\N"""
+        self.assertEqual(_copy_value(None), "\\N")
+        self.assertEqual(_copy_value(float("nan")), "\\N")
+
+    def test_escaping(self):
+        """反斜杠与控制字符转义"""
+        self.assertEqual(_copy_value("a\tb\nc\rd\\e"), "a\\tb\\nc\\rd\\\\e")
+
+    def test_typed_values(self):
+        """枚举、字节、JSON 与日期的文本表示"""
+        self.assertEqual(_copy_value(NewsCategory.FINANCE), NewsCategory.FINANCE.value)
+        self.assertEqual(_copy_value(b"\x01\xff"), "\\\\x01ff")
+        self.assertEqual(_copy_value(["600519.SH", "000001.SZ"]), '["600519.SH","000001.SZ"]')
+        self.assertEqual(_copy_value({"a": 1}), '{"a":1}')
+        self.assertEqual(_copy_value(datetime.date(2024, 1, 2)), "2024-01-02")
+        self.assertEqual(_copy_value(1.5), "1.5")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+多模式关键词匹配的单元测试，pyahocorasick 与纯 Python 实现分别验证
+"""
+import sys
+import os
+import unittest
+from unittest import mock
+
+# Add the backend directory to the path
+backend_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, backend_root)
+
+from app import keyword_matcher
+from app.keyword_matcher import KeywordMatcher
+
+BUCKETS = {
+    "finance": ["股票", "股市", "市场"],
+    "policy": ["政策", "货币政策", "市场监管"],
+    "english": ["he", "she", "his", "hers"],
+}
+
+
+def naive_matches(buckets, text):
+    """逐个关键词查找子串，作为对照结果"""
+    return {
+        (bucket, keyword)
+        for bucket, keywords in buckets.items()
+        for keyword in keywords
+        if text and keyword in text
+    }
+
+
+class KeywordMatcherCases:
+    """两种实现共用的测试用例"""
+
+    def build(self, buckets):
+        raise NotImplementedError
+
+    def test_overlapping_keywords(self):
+        """重叠与互为后缀的关键词全部命中"""
+        matcher = self.build(BUCKETS)
+        self.assertEqual(
+            matcher.matches("ushers"),
+            {("english", "she"), ("english", "he"), ("english", "hers")},
+        )
+        self.assertEqual(
+            matcher.matches("央行调整货币政策"),
+            {("policy", "货币政策"), ("policy", "政策")},
+        )
+
+    def test_keyword_in_several_buckets(self):
+        """同一关键词属于多个分类时每个分类各计一次"""
+        matcher = self.build({"a": ["市场"], "b": ["市场", "监管"]})
+        self.assertEqual(matcher.matches("市场监管"), {("a", "市场"), ("b", "市场"), ("b", "监管")})
+
+    def test_repeated_hits_are_distinct(self):
+        """重复出现的关键词只返回一次"""
+        matcher = self.build(BUCKETS)
+        self.assertEqual(matcher.matches("股票股票股票"), {("finance", "股票")})
+
+    def test_empty_and_no_match(self):
+        """空文本与无命中返回空集合"""
+        matcher = self.build(BUCKETS)
+        self.assertEqual(matcher.matches(""), set())
+        self.assertEqual(matcher.matches(None), set())
+        self.assertEqual(matcher.matches("今天天气不错"), set())
+
+    def test_agrees_with_substring_search(self):
+        """与逐个子串查找的结果一致"""
+        matcher = self.build(BUCKETS)
+        texts = [
+            "市场监管总局发布新政策，股市应声上涨",
+            "she said his shares and hers rose",
+            "股票市场货币政策市场监管",
+        ]
+        for text in texts:
+            self.assertEqual(matcher.matches(text), naive_matches(BUCKETS, text), text)
+
+
+@unittest.skipUnless(keyword_matcher.AHOCORASICK_AVAILABLE, "pyahocorasick 未安装")
+class TestKeywordMatcherAutomaton(KeywordMatcherCases, unittest.TestCase):
+    """pyahocorasick 实现测试类"""
+
+    def build(self, buckets):
+        return KeywordMatcher(buckets)
+
+
+class TestKeywordMatcherFallback(KeywordMatcherCases, unittest.TestCase):
+    """纯 Python 实现测试类"""
+
+    def build(self, buckets):
+        with mock.patch.object(keyword_matcher, "AHOCORASICK_AVAILABLE", False):
+            matcher = KeywordMatcher(buckets)
+        self.assertIsNone(matcher._automaton)
+        return matcher
+
+
+if __name__ == "__main__":
+    unittest.main()
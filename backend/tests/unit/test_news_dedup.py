@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+新闻去重工具的单元测试：URL 规范化、内容哈希与批量保存
+"""
+import asyncio
+import sys
+import os
+import unittest
+from unittest import mock
+
+# Add the backend directory to the path
+backend_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, backend_root)
+
+from app.news_service import (
+    NewsProcessor, canonical_url, content_hash, url_digest, save_articles, _ARTICLE_COLUMNS
+)
+from app.models import NewsCategory
+
+
+class TestCanonicalUrl(unittest.TestCase):
+    """URL 规范化测试类"""
+
+    def test_scheme_and_host_lowercased(self):
+        """协议与主机名统一为小写，路径保持原样"""
+        self.assertEqual(canonical_url("HTTPS://Example.COM/News/A"), "https://example.com/News/A")
+
+    def test_default_port_dropped(self):
+        """默认端口去掉，非默认端口保留"""
+        self.assertEqual(canonical_url("https://example.com:443/a"), "https://example.com/a")
+        self.assertEqual(canonical_url("http://example.com:80/a"), "http://example.com/a")
+        self.assertEqual(canonical_url("http://example.com:8080/a"), "http://example.com:8080/a")
+        # 端口与协议不对应时不是默认端口
+        self.assertEqual(canonical_url("http://example.com:443/a"), "http://example.com:443/a")
+
+    def test_fragment_and_trailing_slash_dropped(self):
+        """去掉锚点和末尾斜杠，空路径规范为 /"""
+        self.assertEqual(canonical_url("https://example.com/a/#top"), "https://example.com/a")
+        self.assertEqual(canonical_url("https://example.com"), "https://example.com/")
+        self.assertEqual(canonical_url("https://example.com/"), "https://example.com/")
+
+    def test_tracking_params_dropped_and_query_sorted(self):
+        """去掉跟踪参数（不区分大小写），其余参数排序"""
+        self.assertEqual(
+            canonical_url("https://example.com/a?utm_source=x&b=2&UTM_Medium=y&a=1&fbclid=z&gclid=w&mc_cid=v"),
+            "https://example.com/a?a=1&b=2",
+        )
+        self.assertEqual(canonical_url("https://example.com/a?utm_source=x"), "https://example.com/a")
+
+    def test_permutations_compare_equal(self):
+        """同一页面的不同写法规范化后相同"""
+        variants = [
+            "https://example.com/news/1?id=5&page=2",
+            "  HTTPS://EXAMPLE.com:443/news/1/?page=2&id=5&utm_campaign=feed#comments ",
+            "https://example.com/news/1?page=2&id=5&",
+        ]
+        self.assertEqual(len({canonical_url(url) for url in variants}), 1)
+        self.assertEqual(len({url_digest(canonical_url(url)) for url in variants}), 1)
+
+    def test_distinct_pages_stay_distinct(self):
+        """路径大小写或参数值不同的页面不会被合并"""
+        self.assertNotEqual(canonical_url("https://example.com/A"), canonical_url("https://example.com/a"))
+        self.assertNotEqual(canonical_url("https://example.com/a?id=1"), canonical_url("https://example.com/a?id=2"))
+
+
+class TestContentHash(unittest.TestCase):
+    """内容哈希测试类"""
+
+    def test_empty_content(self):
+        """空内容没有哈希"""
+        self.assertIsNone(content_hash(None))
+        self.assertIsNone(content_hash(""))
+
+    def test_whitespace_and_case_ignored(self):
+        """忽略空白与大小写差异"""
+        self.assertEqual(content_hash(" Hello\n\tWorld "), content_hash("helloworld"))
+        self.assertEqual(len(content_hash("helloworld")), 20)
+
+    def test_different_content(self):
+        """内容不同则哈希不同"""
+        self.assertNotEqual(content_hash("贵州茅台涨停"), content_hash("贵州茅台跌停"))
+
+
+class TestSaveArticles(unittest.TestCase):
+    """批量保存文章测试类"""
+
+    def _article(self, i):
+        row = dict.fromkeys(_ARTICLE_COLUMNS)
+        row.update(
+            title=f"title {i}",
+            url=f"https://example.com/{i}",
+            canonical_url=f"https://example.com/{i}",
+            content_hash=content_hash(f"content {i}"),
+            source_id=1,
+            category=NewsCategory.FINANCE.value,
+            related_stocks=["600519.SH"],
+            is_duplicate=False,
+        )
+        return row
+
+    def test_chunks_and_counts_inserted_rows(self):
+        """按块写入，返回新插入行数，并为新行建立股票关联"""
+        session = mock.MagicMock()
+        articles = [self._article(i) for i in range(5)]
+        with mock.patch("app.news_service.ARTICLE_INSERT_CHUNK", 2), \
+             mock.patch("app.news_service.bulk_insert_ignore", side_effect=[[1, 2], [], [5]]) as bulk, \
+             mock.patch("app.news_service.link_article_stocks") as link:
+            inserted = save_articles(session, articles)
+
+        self.assertEqual(inserted, 3)
+        self.assertEqual([len(call.args[2]) for call in bulk.call_args_list], [2, 2, 1])
+        for call in bulk.call_args_list:
+            self.assertIsNone(call.args[3], "任一唯一约束冲突都应跳过")
+            self.assertEqual(call.kwargs["returning"], "id")
+        self.assertEqual([call.args[1] for call in link.call_args_list], [[1, 2], [], [5]])
+
+        # 行字典原样传给 Core insert
+        self.assertIs(bulk.call_args_list[0].args[2][0], articles[0])
+
+    def test_no_articles(self):
+        """没有文章时不访问数据库"""
+        session = mock.MagicMock()
+        with mock.patch("app.news_service.bulk_insert_ignore") as bulk:
+            self.assertEqual(save_articles(session, []), 0)
+        bulk.assert_not_called()
+
+
+class TestProcessSingleResult(unittest.TestCase):
+    """搜索结果转换为写入行的测试类"""
+
+    def test_builds_plain_row(self):
+        """结果转换为包含全部写入列的字典，不创建 ORM 实例"""
+        processor = NewsProcessor()
+        with mock.patch.object(processor, "_extract_content", mock.AsyncMock(return_value="贵州茅台 600519.SH 发布年报")), \
+             mock.patch.object(processor, "_get_or_create_source", mock.AsyncMock(return_value=3)), \
+             mock.patch.object(processor, "_analyze_content", mock.AsyncMock(return_value={})):
+            row = asyncio.run(processor._process_single_result(
+                {"url": "https://Example.com/a/?utm_source=x", "title": "年报"}, "600519.SH"
+            ))
+
+        self.assertIs(type(row), dict)
+        self.assertEqual(list(row), _ARTICLE_COLUMNS)
+        self.assertEqual(row["canonical_url"], "https://example.com/a")
+        self.assertEqual(row["source_id"], 3)
+        self.assertEqual(row["content_hash"], content_hash("贵州茅台 600519.SH 发布年报"))
+        self.assertIs(row["is_duplicate"], False)
+        self.assertIn("600519.SH", row["related_stocks"])
+
+    def test_skips_result_without_title(self):
+        """缺少标题的结果被跳过"""
+        row = asyncio.run(NewsProcessor()._process_single_result({"url": "https://example.com/a"}))
+        self.assertIsNone(row)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+列式行情缓存的单元测试：写入后读回、按列裁剪与行格式转换
+"""
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Add the backend directory to the path
+backend_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, backend_root)
+
+from app import price_store as price_store_module
+from app.price_store import PriceStore, frame_records
+
+
+def history_frame():
+    return pd.DataFrame({
+        "trade_date": np.array(["2024-01-02", "2024-01-03", "2024-01-04"], dtype="datetime64[D]"),
+        "open": [10.0, np.nan, 10.5],
+        "high": [10.8, 11.0, 10.9],
+        "low": [9.9, 10.1, 10.2],
+        "close": [10.5, 10.9, 10.3],
+        "pct_chg": [1.0, 3.8, np.nan],
+        "vol": [1200.0, np.nan, 900.0],
+        "amount": [12600.0, 13000.0, 9300.0],
+    })
+
+
+class TestPriceStore(unittest.TestCase):
+    """PriceStore 测试类"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+
+    def test_missing_snapshot(self):
+        """没有快照时返回 None，由调用方回查数据库"""
+        self.assertIsNone(PriceStore(root=self.root).read("600519.SH"))
+
+    def test_recent_write_read_from_memory(self):
+        """TTL 内从内存读取，按列裁剪且返回副本"""
+        store = PriceStore(root=self.root, ttl=300)
+        store.write("600519.SH", history_frame())
+        cached = store.read("600519.SH", columns=["trade_date", "close"])
+        self.assertEqual(list(cached.columns), ["trade_date", "close"])
+        cached.loc[0, "close"] = -1.0
+        self.assertEqual(store.read("600519.SH")["close"].iloc[0], 10.5)
+
+    @unittest.skipUnless(price_store_module.PYARROW_AVAILABLE, "pyarrow 未安装")
+    def test_parquet_round_trip(self):
+        """内存缓存过期后从 Parquet 读回，按列裁剪"""
+        store = PriceStore(root=self.root, ttl=0)
+        self.assertTrue(store.write("600519.SH", history_frame()))
+        cached = store.read("600519.SH", columns=["trade_date", "close", "vol"])
+        self.assertEqual(list(cached.columns), ["trade_date", "close", "vol"])
+        np.testing.assert_allclose(cached["close"], [10.5, 10.9, 10.3])
+
+    def test_empty_frame_not_written(self):
+        """空历史不写入"""
+        store = PriceStore(root=self.root)
+        self.assertFalse(store.write("600519.SH", history_frame().iloc[0:0]))
+        self.assertIsNone(store.read("600519.SH"))
+
+
+class TestFrameRecords(unittest.TestCase):
+    """frame_records 测试类"""
+
+    def test_rows_shaped_like_prices_daily(self):
+        """日期为 date，缺失值为 None，成交量为整数"""
+        records = frame_records(history_frame()[["trade_date", "open", "close", "vol"]])
+        self.assertEqual(records[0], {
+            "trade_date": pd.Timestamp("2024-01-02").date(), "open": 10.0, "close": 10.5, "vol": 1200,
+        })
+        self.assertIsNone(records[1]["open"])
+        self.assertIsNone(records[1]["vol"])
+        self.assertIsInstance(records[2]["vol"], int)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+技术信号计算的单元测试：numpy 实现与原 pandas 实现结果一致
+"""
+import sys
+import os
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+# Add the backend directory to the path
+backend_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, backend_root)
+
+from app import signals
+from app.signals import compute_signals, rsi, macd, _ewma, _move_mean
+
+
+# ---- 原 pandas 实现，作为对照 ----
+
+def reference_rsi(series: pd.Series, period: int = 14) -> pd.Series:
+    delta = series.diff()
+    up = np.where(delta > 0, delta, 0.0)
+    down = np.where(delta < 0, -delta, 0.0)
+    roll_up = pd.Series(up, index=series.index).ewm(alpha=1/period, adjust=False).mean()
+    roll_down = pd.Series(down, index=series.index).ewm(alpha=1/period, adjust=False).mean()
+    rs = roll_up / (roll_down + 1e-9)
+    return 100.0 - (100.0 / (1.0 + rs))
+
+def reference_macd(series: pd.Series, fast=12, slow=26, signal=9):
+    e1 = series.ewm(span=fast, adjust=False).mean()
+    e2 = series.ewm(span=slow, adjust=False).mean()
+    macd_line = e1 - e2
+    signal_line = macd_line.ewm(span=signal, adjust=False).mean()
+    hist = macd_line - signal_line
+    return macd_line, signal_line, hist
+
+def reference_signals(df: pd.DataFrame, short=10, long=30) -> pd.DataFrame:
+    df = df.sort_values("trade_date").copy()
+    df["ma_s"] = df["close"].rolling(short).mean()
+    df["ma_l"] = df["close"].rolling(long).mean()
+    df["rsi"] = reference_rsi(df["close"], 14)
+    macd_line, signal_line, hist = reference_macd(df["close"])
+    df["macd"] = macd_line
+    df["macd_sig"] = signal_line
+    df["macd_hist"] = hist
+
+    score = np.zeros(len(df))
+    cross_up = (df["ma_s"] > df["ma_l"]) & (df["ma_s"].shift(1) <= df["ma_l"].shift(1))
+    cross_dn = (df["ma_s"] < df["ma_l"]) & (df["ma_s"].shift(1) >= df["ma_l"].shift(1))
+    score = score + np.where(cross_up, 20, 0) - np.where(cross_dn, 20, 0)
+    score += np.clip(50 - (df["rsi"] - 50).abs(), -15, 15)
+    score += np.where((df["macd"] > df["macd_sig"]) & (df["macd"].shift(1) <= df["macd_sig"].shift(1)), 10, 0)
+
+    df["signal_score"] = score
+    df["action"] = np.where(
+        df["signal_score"] >= 15, "BUY",
+        np.where(df["signal_score"] <= -15, "TRIM", "HOLD")
+    )
+    return df
+
+
+def random_walk(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100.0 + np.cumsum(rng.normal(0, 1.5, n))
+
+def price_frame(close):
+    dates = pd.date_range("2023-01-02", periods=len(close), freq="B")
+    # 倒序传入，验证按日期排序
+    return pd.DataFrame({"trade_date": dates, "close": close}).iloc[::-1].reset_index(drop=True)
+
+
+class TestEwma(unittest.TestCase):
+    """递推 EWMA 测试类"""
+
+    def test_matches_pandas(self):
+        """IIR 滤波结果与 ewm(adjust=False) 一致"""
+        values = random_walk(300)
+        for alpha in (1 / 14, 2 / 13, 2 / 27, 0.5, 1.0):
+            expected = pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+            np.testing.assert_allclose(_ewma(values, alpha), expected, rtol=1e-12, atol=1e-9)
+
+    def test_nan_inputs(self):
+        """含缺失值（包括首个值缺失）时按 pandas 语义跳过 NaN"""
+        values = random_walk(60)
+        values[[0, 5, 6, 30]] = np.nan
+        expected = pd.Series(values).ewm(alpha=0.1, adjust=False).mean().to_numpy()
+        np.testing.assert_allclose(_ewma(values, 0.1), expected, rtol=1e-12, equal_nan=True)
+
+    def test_short_inputs(self):
+        """空数组与单个值"""
+        self.assertEqual(len(_ewma(np.array([], dtype=float), 0.1)), 0)
+        np.testing.assert_allclose(_ewma(np.array([3.0]), 0.1), [3.0])
+
+
+class MoveMeanCases:
+    """滚动均值用例，bottleneck 与纯 numpy 实现共用"""
+
+    def check(self, values, window):
+        expected = pd.Series(values).rolling(window).mean().to_numpy()
+        np.testing.assert_allclose(_move_mean(values, window), expected, rtol=1e-9, equal_nan=True)
+
+    def test_matches_rolling(self):
+        """与 rolling(window).mean() 一致"""
+        values = random_walk(200)
+        for window in (1, 10, 30, 200):
+            self.check(values, window)
+
+    def test_nan_inputs(self):
+        """缺失值只影响所在窗口"""
+        values = random_walk(80)
+        values[[3, 40, 41]] = np.nan
+        for window in (5, 30):
+            self.check(values, window)
+
+    def test_shorter_than_window(self):
+        """数据不足一个窗口时全为 NaN"""
+        result = _move_mean(random_walk(5), 10)
+        self.assertEqual(len(result), 5)
+        self.assertTrue(np.isnan(result).all())
+
+
+@unittest.skipUnless(signals.BOTTLENECK_AVAILABLE, "bottleneck 未安装")
+class TestMoveMeanBottleneck(MoveMeanCases, unittest.TestCase):
+    """bottleneck 实现测试类"""
+
+
+class TestMoveMeanFallback(MoveMeanCases, unittest.TestCase):
+    """纯 numpy 实现测试类"""
+
+    def setUp(self):
+        patcher = mock.patch.object(signals, "BOTTLENECK_AVAILABLE", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestIndicators(unittest.TestCase):
+    """RSI / MACD 测试类"""
+
+    def test_rsi_matches_reference(self):
+        """RSI 与原实现一致，包括缺失值"""
+        close = random_walk(250, seed=1)
+        close[[20, 21, 100]] = np.nan
+        expected = reference_rsi(pd.Series(close)).to_numpy()
+        np.testing.assert_allclose(rsi(close), expected, rtol=1e-9, atol=1e-9, equal_nan=True)
+
+    def test_macd_matches_reference(self):
+        """MACD 三条线与原实现一致，包括缺失值"""
+        close = random_walk(250, seed=2)
+        close[[0, 50]] = np.nan
+        for actual, expected in zip(macd(close), reference_macd(pd.Series(close))):
+            np.testing.assert_allclose(actual, expected.to_numpy(), rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+class TestComputeSignals(unittest.TestCase):
+    """compute_signals 测试类"""
+
+    COLUMNS = ["ma_s", "ma_l", "rsi", "macd", "macd_sig", "macd_hist", "signal_score"]
+
+    def assert_same_as_reference(self, df):
+        actual = compute_signals(df)
+        expected = reference_signals(df)
+        pd.testing.assert_index_equal(actual.index, expected.index)
+        pd.testing.assert_series_equal(actual["trade_date"], expected["trade_date"])
+        for column in self.COLUMNS:
+            np.testing.assert_allclose(
+                actual[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+                rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=column,
+            )
+        self.assertEqual(actual["action"].tolist(), expected["action"].tolist())
+
+    def test_matches_reference(self):
+        """各列与动作分类与原实现一致"""
+        for seed in range(5):
+            self.assert_same_as_reference(price_frame(random_walk(300, seed=seed)))
+
+    def test_matches_reference_with_nan(self):
+        """收盘价含缺失值时与原实现一致"""
+        close = random_walk(300, seed=7)
+        close[[0, 15, 16, 120, 299]] = np.nan
+        self.assert_same_as_reference(price_frame(close))
+
+    def test_short_history(self):
+        """历史短于均线窗口时不报错"""
+        self.assert_same_as_reference(price_frame(random_walk(5)))
+
+    def test_input_not_modified(self):
+        """不修改传入的 DataFrame"""
+        df = price_frame(random_walk(50))
+        before = df.copy()
+        compute_signals(df)
+        pd.testing.assert_frame_equal(df, before)
+
+
+if __name__ == "__main__":
+    unittest.main()
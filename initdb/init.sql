@@ -4,25 +4,38 @@ CREATE TABLE IF NOT EXISTS watchlist (
   symbol VARCHAR(16) NOT NULL,
   name VARCHAR(64),
   sector VARCHAR(64),
-  enabled BOOLEAN DEFAULT TRUE,
+  enabled BOOLEAN NOT NULL DEFAULT TRUE,
   UNIQUE(symbol)
 );
 
+-- 按 trade_date 年度范围分区，时间窗口查询可在规划阶段裁剪分区
 CREATE TABLE IF NOT EXISTS prices_daily (
-  id BIGSERIAL PRIMARY KEY,
+  id BIGSERIAL,
   symbol VARCHAR(16) NOT NULL,
   trade_date DATE NOT NULL,
-  open NUMERIC(18,4),
-  high NUMERIC(18,4),
-  low NUMERIC(18,4),
-  close NUMERIC(18,4),
-  pre_close NUMERIC(18,4),
-  change NUMERIC(18,4),
-  pct_chg NUMERIC(8,4),
+  trade_day INTEGER GENERATED ALWAYS AS (trade_date - DATE '1970-01-01') STORED,
+  open DOUBLE PRECISION,
+  high DOUBLE PRECISION,
+  low DOUBLE PRECISION,
+  close DOUBLE PRECISION,
+  pre_close DOUBLE PRECISION,
+  change DOUBLE PRECISION,
+  pct_chg DOUBLE PRECISION,
   vol BIGINT,
-  amount NUMERIC(20,2),
+  amount DOUBLE PRECISION,
+  PRIMARY KEY (id, trade_date),
   UNIQUE(symbol, trade_date)
-);
+) PARTITION BY RANGE (trade_date);
+DO $$
+BEGIN
+  FOR y IN 2000..2035 LOOP
+    EXECUTE format(
+      'CREATE TABLE IF NOT EXISTS prices_daily_%s PARTITION OF prices_daily FOR VALUES FROM (%L) TO (%L)',
+      y, make_date(y, 1, 1), make_date(y + 1, 1, 1)
+    );
+  END LOOP;
+END $$;
+CREATE TABLE IF NOT EXISTS prices_daily_default PARTITION OF prices_daily DEFAULT;
 CREATE INDEX IF NOT EXISTS idx_prices_symbol_date ON prices_daily(symbol, trade_date);
 
 CREATE TABLE IF NOT EXISTS forecasts (
@@ -31,57 +44,70 @@ CREATE TABLE IF NOT EXISTS forecasts (
   run_at TIMESTAMP NOT NULL,
   target_date DATE NOT NULL,
   model VARCHAR(32) NOT NULL,
-  yhat NUMERIC(18,4),
-  yhat_lower NUMERIC(18,4),
-  yhat_upper NUMERIC(18,4)
+  yhat DOUBLE PRECISION,
+  yhat_lower DOUBLE PRECISION,
+  yhat_upper DOUBLE PRECISION
 );
+CREATE INDEX IF NOT EXISTS ix_forecast_symbol_target ON forecasts(symbol, target_date);
 
 CREATE TABLE IF NOT EXISTS signals (
   id BIGSERIAL PRIMARY KEY,
   symbol VARCHAR(16) NOT NULL,
   trade_date DATE NOT NULL,
-  ma_short NUMERIC(18,4),
-  ma_long NUMERIC(18,4),
-  rsi NUMERIC(8,4),
-  macd NUMERIC(18,4),
-  signal_score NUMERIC(8,4),
-  action VARCHAR(16)
+  ma_short DOUBLE PRECISION,
+  ma_long DOUBLE PRECISION,
+  rsi DOUBLE PRECISION,
+  macd DOUBLE PRECISION,
+  signal_score DOUBLE PRECISION,
+  action VARCHAR(16) NOT NULL
 );
+CREATE UNIQUE INDEX IF NOT EXISTS ix_signals_symbol_date ON signals(symbol, trade_date);
 
 -- 任务表
+DO $$
+BEGIN
+  IF to_regtype('task_status_enum') IS NULL THEN
+    CREATE TYPE task_status_enum AS ENUM ('pending', 'running', 'completed', 'failed');
+  END IF;
+  IF to_regtype('task_type_enum') IS NULL THEN
+    CREATE TYPE task_type_enum AS ENUM ('generate_report', 'fetch_data', 'train_model', 'fetch_news', 'analyze_news');
+  END IF;
+END $$;
 CREATE TABLE IF NOT EXISTS tasks (
   id BIGSERIAL PRIMARY KEY,
-  task_type VARCHAR(32) NOT NULL,
+  task_type task_type_enum NOT NULL,
   symbol VARCHAR(16) NOT NULL,
-  status VARCHAR(16) DEFAULT 'pending',
-  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  status task_status_enum NOT NULL DEFAULT 'pending',
+  created_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
   started_at TIMESTAMP,
   completed_at TIMESTAMP,
   error_message TEXT,
-  priority INTEGER DEFAULT 5,
+  priority INTEGER NOT NULL DEFAULT 5,
   task_metadata TEXT
 );
 
-CREATE INDEX IF NOT EXISTS idx_task_status_priority ON tasks(status, priority);
+CREATE INDEX IF NOT EXISTS idx_task_pending_priority ON tasks(priority, created_at) WHERE status = 'pending';
 CREATE INDEX IF NOT EXISTS idx_task_symbol_type ON tasks(symbol, task_type);
+CREATE INDEX IF NOT EXISTS tasks_created_at_brin ON tasks USING brin(created_at);
 
 -- 报告表
 CREATE TABLE IF NOT EXISTS reports (
   id BIGSERIAL PRIMARY KEY,
   symbol VARCHAR(16) NOT NULL,
-  version INTEGER DEFAULT 1,
-  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-  is_latest BOOLEAN DEFAULT TRUE,
-  latest_price_data TEXT,
-  signal_data TEXT,
-  forecast_data TEXT,
+  version INTEGER NOT NULL DEFAULT 1,
+  created_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+  is_latest BOOLEAN NOT NULL DEFAULT TRUE,
+  latest_price_data JSONB,
+  signal_data JSONB,
+  forecast_data JSONB,
   analysis_summary TEXT,
-  data_quality_score NUMERIC(4,2),
-  prediction_confidence NUMERIC(5,3)
+  data_quality_score DOUBLE PRECISION,
+  prediction_confidence DOUBLE PRECISION
 );
 
-CREATE INDEX IF NOT EXISTS idx_report_symbol_latest ON reports(symbol, is_latest);
 CREATE INDEX IF NOT EXISTS idx_report_symbol_version ON reports(symbol, version);
+-- 每个股票只有一份最新报告
+CREATE UNIQUE INDEX IF NOT EXISTS uq_report_symbol_latest ON reports(symbol) WHERE is_latest;
 
 INSERT INTO watchlist(symbol, name, sector) VALUES
 ('600519.SH','贵州茅台','白酒'),
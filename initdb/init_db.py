@@ -1,4 +1,5 @@
 import os
+import glob
 from dotenv import load_dotenv
 import psycopg2
 
@@ -34,7 +35,39 @@ def run_sql(sql_path):
             cur.execute(sql)
     print(f"Executed {sql_path} successfully.")
 
+# Apply schema upgrades for databases created from an older init.sql.
+# Statements run one by one in autocommit mode so that
+# CREATE INDEX CONCURRENTLY is allowed. DO $$ ... $$ blocks are kept whole.
+def run_migration(sql_path):
+    with open(sql_path, "r", encoding="utf-8") as f:
+        sql = f.read()
+    statements = []
+    pending = ""
+    for chunk in sql.split(";\n"):
+        pending = f"{pending};\n{chunk}" if pending else chunk
+        if pending.count("$$") % 2:
+            continue
+        lines = [line for line in pending.splitlines() if not line.strip().startswith("--")]
+        statement = "\n".join(lines).strip().rstrip(";")
+        pending = ""
+        if statement:
+            statements.append(statement)
+    conn = psycopg2.connect(dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            for statement in statements:
+                cur.execute(statement)
+    finally:
+        conn.close()
+    print(f"Applied migration {sql_path} successfully.")
+
+def run_migrations(migrations_dir):
+    for sql_path in sorted(glob.glob(os.path.join(migrations_dir, "*.sql"))):
+        run_migration(sql_path)
+
 if __name__ == "__main__":
     ensure_db_exists()
     sql_file = os.path.join(os.path.dirname(__file__), "init.sql")
     run_sql(sql_file)
+    run_migrations(os.path.join(os.path.dirname(__file__), "migrations"))
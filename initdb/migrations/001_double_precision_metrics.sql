@@ -0,0 +1,34 @@
+-- 行情、预测、信号及报告指标列由 NUMERIC 改为 DOUBLE PRECISION（仅在仍为 NUMERIC 时执行）
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = 'prices_daily' AND column_name = 'close' AND data_type = 'numeric') THEN
+    ALTER TABLE prices_daily
+      ALTER COLUMN open TYPE DOUBLE PRECISION USING open::double precision,
+      ALTER COLUMN high TYPE DOUBLE PRECISION USING high::double precision,
+      ALTER COLUMN low TYPE DOUBLE PRECISION USING low::double precision,
+      ALTER COLUMN close TYPE DOUBLE PRECISION USING close::double precision,
+      ALTER COLUMN pre_close TYPE DOUBLE PRECISION USING pre_close::double precision,
+      ALTER COLUMN change TYPE DOUBLE PRECISION USING change::double precision,
+      ALTER COLUMN pct_chg TYPE DOUBLE PRECISION USING pct_chg::double precision,
+      ALTER COLUMN amount TYPE DOUBLE PRECISION USING amount::double precision;
+  END IF;
+  IF EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = 'forecasts' AND column_name = 'yhat' AND data_type = 'numeric') THEN
+    ALTER TABLE forecasts
+      ALTER COLUMN yhat TYPE DOUBLE PRECISION USING yhat::double precision,
+      ALTER COLUMN yhat_lower TYPE DOUBLE PRECISION USING yhat_lower::double precision,
+      ALTER COLUMN yhat_upper TYPE DOUBLE PRECISION USING yhat_upper::double precision;
+  END IF;
+  IF EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = 'signals' AND column_name = 'rsi' AND data_type = 'numeric') THEN
+    ALTER TABLE signals
+      ALTER COLUMN ma_short TYPE DOUBLE PRECISION USING ma_short::double precision,
+      ALTER COLUMN ma_long TYPE DOUBLE PRECISION USING ma_long::double precision,
+      ALTER COLUMN rsi TYPE DOUBLE PRECISION USING rsi::double precision,
+      ALTER COLUMN macd TYPE DOUBLE PRECISION USING macd::double precision,
+      ALTER COLUMN signal_score TYPE DOUBLE PRECISION USING signal_score::double precision;
+  END IF;
+  IF EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = 'reports' AND column_name = 'data_quality_score' AND data_type = 'numeric') THEN
+    ALTER TABLE reports
+      ALTER COLUMN data_quality_score TYPE DOUBLE PRECISION USING data_quality_score::double precision,
+      ALTER COLUMN prediction_confidence TYPE DOUBLE PRECISION USING prediction_confidence::double precision;
+  END IF;
+END $$;
@@ -0,0 +1,8 @@
+-- 清理重复信号，保留每个 (symbol, trade_date) 最新写入的一行
+DELETE FROM signals a
+  USING signals b
+  WHERE a.symbol = b.symbol AND a.trade_date = b.trade_date AND a.id < b.id;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_signals_symbol_date ON signals(symbol, trade_date);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_forecast_symbol_target ON forecasts(symbol, target_date);
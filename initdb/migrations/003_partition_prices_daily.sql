@@ -0,0 +1,44 @@
+-- 将 prices_daily 改为按 trade_date 年度范围分区的表（仅在仍为普通表时执行）
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'prices_daily' AND relkind = 'r') THEN
+    ALTER TABLE prices_daily RENAME TO prices_daily_legacy;
+    ALTER INDEX IF EXISTS prices_daily_pkey RENAME TO prices_daily_legacy_pkey;
+    ALTER INDEX IF EXISTS prices_daily_symbol_trade_date_key RENAME TO prices_daily_legacy_symbol_trade_date_key;
+    DROP INDEX IF EXISTS idx_prices_symbol_date;
+    DROP INDEX IF EXISTS ix_prices_symbol_date;
+
+    CREATE TABLE prices_daily (
+      id BIGINT NOT NULL DEFAULT nextval('prices_daily_id_seq'),
+      symbol VARCHAR(16) NOT NULL,
+      trade_date DATE NOT NULL,
+      open DOUBLE PRECISION,
+      high DOUBLE PRECISION,
+      low DOUBLE PRECISION,
+      close DOUBLE PRECISION,
+      pre_close DOUBLE PRECISION,
+      change DOUBLE PRECISION,
+      pct_chg DOUBLE PRECISION,
+      vol BIGINT,
+      amount DOUBLE PRECISION,
+      PRIMARY KEY (id, trade_date),
+      UNIQUE(symbol, trade_date)
+    ) PARTITION BY RANGE (trade_date);
+    ALTER SEQUENCE prices_daily_id_seq OWNED BY prices_daily.id;
+
+    FOR y IN 2000..2035 LOOP
+      EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS prices_daily_%s PARTITION OF prices_daily FOR VALUES FROM (%L) TO (%L)',
+        y, make_date(y, 1, 1), make_date(y + 1, 1, 1)
+      );
+    END LOOP;
+    CREATE TABLE IF NOT EXISTS prices_daily_default PARTITION OF prices_daily DEFAULT;
+
+    INSERT INTO prices_daily (id, symbol, trade_date, open, high, low, close, pre_close, change, pct_chg, vol, amount)
+      SELECT id, symbol, trade_date, open, high, low, close, pre_close, change, pct_chg, vol, amount
+      FROM prices_daily_legacy;
+    DROP TABLE prices_daily_legacy;
+
+    CREATE INDEX idx_prices_symbol_date ON prices_daily(symbol, trade_date);
+  END IF;
+END $$;
@@ -0,0 +1,15 @@
+-- news_articles 由 SQLAlchemy 创建；已有库将 keywords/entities 从 JSON 转为 JSONB 并建 GIN 索引
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'news_articles' AND column_name = 'keywords' AND data_type = 'json'
+  ) THEN
+    ALTER TABLE news_articles
+      ALTER COLUMN keywords TYPE jsonb USING keywords::jsonb,
+      ALTER COLUMN entities TYPE jsonb USING entities::jsonb;
+  END IF;
+  IF to_regclass('news_articles') IS NOT NULL THEN
+    CREATE INDEX IF NOT EXISTS idx_news_keywords_gin ON news_articles USING gin (keywords jsonb_path_ops);
+  END IF;
+END $$;
@@ -0,0 +1,11 @@
+-- 每个股票只保留版本号最大的一份 is_latest 报告，再用部分唯一索引替换 (symbol, is_latest) 索引
+UPDATE reports r SET is_latest = false
+  WHERE r.is_latest AND EXISTS (
+    SELECT 1 FROM reports n
+    WHERE n.symbol = r.symbol AND n.is_latest
+      AND (n.version > r.version OR (n.version = r.version AND n.id > r.id))
+  );
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_report_symbol_latest ON reports(symbol) WHERE is_latest;
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_report_symbol_latest;
@@ -0,0 +1,4 @@
+-- 待处理任务扫描按 (priority, created_at) 排序，部分索引只包含 pending 行
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_task_pending_priority ON tasks(priority, created_at) WHERE status = 'pending';
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_task_status_priority;
@@ -0,0 +1,8 @@
+-- news_articles 增加正文 SHA-1 列，唯一索引使同内容不同 URL 的文章在写入时被跳过
+DO $$
+BEGIN
+  IF to_regclass('news_articles') IS NOT NULL THEN
+    ALTER TABLE news_articles ADD COLUMN IF NOT EXISTS content_hash BYTEA;
+    CREATE UNIQUE INDEX IF NOT EXISTS ix_news_content_hash ON news_articles(content_hash);
+  END IF;
+END $$;
@@ -0,0 +1,23 @@
+-- 创建时间改由数据库填充（无时区 UTC），已有表补设列默认值
+DO $$
+DECLARE
+  target RECORD;
+BEGIN
+  FOR target IN
+    SELECT * FROM (VALUES
+      ('stocks', 'created_at'),
+      ('tasks', 'created_at'),
+      ('reports', 'created_at'),
+      ('news_sources', 'created_at'),
+      ('news_articles', 'crawled_at'),
+      ('search_logs', 'created_at')
+    ) AS t(table_name, column_name)
+  LOOP
+    IF to_regclass(target.table_name) IS NOT NULL THEN
+      EXECUTE format(
+        'ALTER TABLE %I ALTER COLUMN %I SET DEFAULT (now() AT TIME ZONE ''utc'')',
+        target.table_name, target.column_name
+      );
+    END IF;
+  END LOOP;
+END $$;
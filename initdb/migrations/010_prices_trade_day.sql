@@ -0,0 +1,2 @@
+-- prices_daily 增加 trade_day（距 1970-01-01 的天数）生成列，供批量读取直接转换为 datetime64
+ALTER TABLE prices_daily ADD COLUMN IF NOT EXISTS trade_day INTEGER GENERATED ALWAYS AS (trade_date - DATE '1970-01-01') STORED;
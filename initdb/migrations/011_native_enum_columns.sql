@@ -0,0 +1,39 @@
+-- 任务状态/类型及新闻分类/情绪列由 VARCHAR 改为 Postgres 原生 ENUM
+DO $$
+BEGIN
+  IF to_regtype('task_status_enum') IS NULL THEN
+    CREATE TYPE task_status_enum AS ENUM ('pending', 'running', 'completed', 'failed');
+  END IF;
+  IF to_regtype('task_type_enum') IS NULL THEN
+    CREATE TYPE task_type_enum AS ENUM ('generate_report', 'fetch_data', 'train_model', 'fetch_news', 'analyze_news');
+  END IF;
+  IF to_regtype('news_category_enum') IS NULL THEN
+    CREATE TYPE news_category_enum AS ENUM ('finance', 'policy', 'industry', 'company', 'market', 'economic');
+  END IF;
+  IF to_regtype('sentiment_type_enum') IS NULL THEN
+    CREATE TYPE sentiment_type_enum AS ENUM ('positive', 'negative', 'neutral');
+  END IF;
+
+  IF EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'tasks' AND column_name = 'status' AND data_type = 'character varying'
+  ) THEN
+    -- 部分索引谓词引用 status，先删除再按新类型重建
+    DROP INDEX IF EXISTS idx_task_pending_priority;
+    ALTER TABLE tasks ALTER COLUMN status DROP DEFAULT;
+    ALTER TABLE tasks
+      ALTER COLUMN status TYPE task_status_enum USING status::task_status_enum,
+      ALTER COLUMN task_type TYPE task_type_enum USING task_type::task_type_enum;
+    ALTER TABLE tasks ALTER COLUMN status SET DEFAULT 'pending';
+    CREATE INDEX idx_task_pending_priority ON tasks(priority, created_at) WHERE status = 'pending';
+  END IF;
+
+  IF EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'news_articles' AND column_name = 'category' AND data_type = 'character varying'
+  ) THEN
+    ALTER TABLE news_articles
+      ALTER COLUMN category TYPE news_category_enum USING category::news_category_enum,
+      ALTER COLUMN sentiment_type TYPE sentiment_type_enum USING sentiment_type::sentiment_type_enum;
+  END IF;
+END $$;
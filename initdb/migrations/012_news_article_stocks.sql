@@ -0,0 +1,22 @@
+-- related_stocks 展开为股票-文章关联表，并回填已有文章
+DO $$
+BEGIN
+  IF to_regclass('news_articles') IS NOT NULL THEN
+    CREATE TABLE IF NOT EXISTS news_article_stocks (
+      article_id BIGINT NOT NULL REFERENCES news_articles(id) ON DELETE CASCADE,
+      symbol VARCHAR(16) NOT NULL,
+      published_at TIMESTAMP,
+      PRIMARY KEY (article_id, symbol)
+    );
+    CREATE INDEX IF NOT EXISTS ix_nas_symbol_date ON news_article_stocks(symbol, published_at);
+
+    IF NOT EXISTS (SELECT 1 FROM news_article_stocks LIMIT 1) THEN
+      INSERT INTO news_article_stocks (article_id, symbol, published_at)
+      SELECT a.id, s.symbol, a.published_at
+      FROM news_articles a
+      CROSS JOIN LATERAL jsonb_array_elements_text(a.related_stocks) AS s(symbol)
+      WHERE jsonb_typeof(a.related_stocks) = 'array' AND length(s.symbol) <= 16
+      ON CONFLICT DO NOTHING;
+    END IF;
+  END IF;
+END $$;
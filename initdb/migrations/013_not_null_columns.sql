@@ -0,0 +1,22 @@
+-- 与 ORM 声明对齐：补齐缺省值后为必填列加 NOT NULL
+UPDATE watchlist SET enabled = TRUE WHERE enabled IS NULL;
+ALTER TABLE watchlist ALTER COLUMN enabled SET NOT NULL;
+
+UPDATE signals SET action = 'HOLD' WHERE action IS NULL;
+ALTER TABLE signals ALTER COLUMN action SET NOT NULL;
+
+UPDATE tasks SET status = 'pending' WHERE status IS NULL;
+UPDATE tasks SET priority = 5 WHERE priority IS NULL;
+UPDATE tasks SET created_at = (now() AT TIME ZONE 'utc') WHERE created_at IS NULL;
+ALTER TABLE tasks
+  ALTER COLUMN status SET NOT NULL,
+  ALTER COLUMN priority SET NOT NULL,
+  ALTER COLUMN created_at SET NOT NULL;
+
+UPDATE reports SET version = 1 WHERE version IS NULL;
+UPDATE reports SET is_latest = FALSE WHERE is_latest IS NULL;
+UPDATE reports SET created_at = (now() AT TIME ZONE 'utc') WHERE created_at IS NULL;
+ALTER TABLE reports
+  ALTER COLUMN version SET NOT NULL,
+  ALTER COLUMN is_latest SET NOT NULL,
+  ALTER COLUMN created_at SET NOT NULL;
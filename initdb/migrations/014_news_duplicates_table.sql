@@ -0,0 +1,19 @@
+-- 重复文章映射由 news_articles.duplicate_of 自引用外键移到 news_duplicates 表
+DO $$
+BEGIN
+  IF to_regclass('news_articles') IS NOT NULL THEN
+    CREATE TABLE IF NOT EXISTS news_duplicates (
+      article_id BIGINT PRIMARY KEY REFERENCES news_articles(id) ON DELETE CASCADE,
+      canonical_id BIGINT NOT NULL REFERENCES news_articles(id) ON DELETE CASCADE
+    );
+    IF EXISTS (
+      SELECT 1 FROM information_schema.columns
+      WHERE table_name = 'news_articles' AND column_name = 'duplicate_of'
+    ) THEN
+      INSERT INTO news_duplicates (article_id, canonical_id)
+      SELECT id, duplicate_of FROM news_articles WHERE duplicate_of IS NOT NULL
+      ON CONFLICT DO NOTHING;
+      ALTER TABLE news_articles DROP COLUMN duplicate_of;
+    END IF;
+  END IF;
+END $$;
@@ -0,0 +1,9 @@
+-- news_articles 增加规范化 URL 列，唯一索引使仅跟踪参数不同的同一文章在写入时被跳过
+-- 既有行保持 NULL（NULL 互不冲突），新写入的文章由应用层填充
+DO $$
+BEGIN
+  IF to_regclass('news_articles') IS NOT NULL THEN
+    ALTER TABLE news_articles ADD COLUMN IF NOT EXISTS canonical_url VARCHAR(1000);
+    CREATE UNIQUE INDEX IF NOT EXISTS ix_news_canonical_url ON news_articles(canonical_url);
+  END IF;
+END $$;
@@ -0,0 +1,13 @@
+-- 报告的价格/信号/预测数据由 TEXT 中的 JSON 字符串改为 JSONB，应用直接读写 dict/list
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'reports' AND column_name = 'latest_price_data' AND data_type = 'text'
+  ) THEN
+    ALTER TABLE reports
+      ALTER COLUMN latest_price_data TYPE jsonb USING latest_price_data::jsonb,
+      ALTER COLUMN signal_data TYPE jsonb USING signal_data::jsonb,
+      ALTER COLUMN forecast_data TYPE jsonb USING forecast_data::jsonb;
+  END IF;
+END $$;
@@ -0,0 +1,3 @@
+-- mv_symbol_latest 不再被读取（报告按股票读基础表与行情缓存，仪表板只查报告与任务）；
+-- 删除已执行过旧迁移的数据库中遗留的物化视图
+DROP MATERIALIZED VIEW IF EXISTS mv_symbol_latest;